@@ -0,0 +1,111 @@
+"""
+Measures the cost of a lox function call with a recursive fib, which does little more than call itself.
+
+    python benchmarks/calls.py --n 25 --output calls.json
+    python benchmarks/calls.py --compare calls.json
+    python benchmarks/calls.py --no-pool
+
+fib(n) makes 2 * fib(n + 1) - 1 calls. Every engine runs the program --repeat times and the best run is kept.
+--no-pool allocates a new frame for every call, to see what the frame pool saves.
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+from argparse import ArgumentParser
+
+# the lox package lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox import Stmt
+from lox.session import Session, ENGINES
+
+PROGRAM = """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib({n});
+"""
+
+
+def fib(n: int) -> int:
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def bench_engine(engine: str, n: int, repeat: int, pool: bool) -> dict:
+    stdout = io.StringIO()
+    session = Session(stdout=stdout)
+    program = session.parse(PROGRAM.replace("{n}", str(n)))
+    if not pool:
+        for statement in program:
+            if type(statement) is Stmt.Function:
+                statement.pooled = False
+    interpreter = session.engines[engine]
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        interpreter.execute_program(program)
+        best = min(best, time.perf_counter() - start)
+    if stdout.getvalue().split() != [str(fib(n))] * repeat:
+        raise SystemExit(f"the {engine} engine printed {stdout.getvalue()!r}")
+
+    calls = 2 * fib(n + 1) - 1
+    return {
+        "seconds": best,
+        "calls": calls,
+        "calls_per_second": calls / best,
+        "us_per_call": best / calls * 1e6,
+    }
+
+
+def compare(old: dict, new: dict):
+    # new time / old time per engine, > 1 means slower than before
+    print(f"{'engine':<10} {'old us':>8} {'new us':>8} {'ratio':>7}")
+    for engine, result in new["engines"].items():
+        if engine not in old["engines"]: continue
+        before = old["engines"][engine]["us_per_call"]
+        after = result["us_per_call"]
+        print(f"{engine:<10} {before:>8.2f} {after:>8.2f} {after / before:>7.2f}")
+
+
+def main():
+    arg_parser = ArgumentParser(description="Benchmark lox function calls with a recursive fib.")
+    arg_parser.add_argument('--n', type=int, default=25, help="argument of fib")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="timed runs per engine, the best one is kept")
+    arg_parser.add_argument('--engine', action='append', choices=sorted(ENGINES),
+                            help="engines to run (default: all), can be given more than once")
+    arg_parser.add_argument('--no-pool', action='store_true', help="allocate a new frame for every call")
+    arg_parser.add_argument('--output', help="write the results to this json file")
+    arg_parser.add_argument('--compare', help="json results of an earlier run to compare against")
+    args = arg_parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "n": args.n,
+        "pool": not args.no_pool,
+        "engines": {},
+    }
+    for engine in args.engine or sorted(ENGINES):
+        result = bench_engine(engine, args.n, args.repeat, not args.no_pool)
+        results["engines"][engine] = result
+        print(f"{engine:<10} fib({args.n}) {result['seconds']:>7.3f} s  {result['calls']:>9} calls  "
+              f"{result['calls_per_second']:>10,.0f} calls/s  {result['us_per_call']:>6.2f} us/call")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Compares the latency of one small edit with an incremental Document against scanning and parsing the whole
+edited source again, on programs of growing size.
+
+    python benchmarks/incremental.py --sizes 100,1000,10000 --output incremental.json
+
+Every edit retypes one digit in the middle of the program, the way a keystroke would, and the median over --edits
+edits is reported. Before timing, the edits of KEYSTROKES are replayed one character at a time and the document
+is checked against a fresh one of the same text.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+from argparse import ArgumentParser
+
+# the lox package lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox.incremental import Document
+from lox.regex_scanner import RegexScanner
+from lox.parser import Parser
+from lox.resolver import Resolver
+from lox.ast_printer import AstPrinter
+
+DECLARATION = """fun f{i}(n) {{
+  if (n < 2) return n;
+  return f{i}(n - 1) + f{i}(n - 2);
+}}
+var a{i} = {i};
+"""
+
+# (source, offset, removed, text typed there one character at a time) of edits that once went wrong
+KEYSTROKES = [
+    # an else typed in front of the statement after a complete if
+    ("if (a) print 1;\nprint 2;\n", 16, 0, "else "),
+    # a mistyped else fixed, the else now starts the segment
+    ("if (a) print 1;\nelsx print 2;\n", 19, 1, "e"),
+]
+
+
+def check_keystrokes():
+    printer = AstPrinter()
+    for source, offset, removed, text in KEYSTROKES:
+        document = Document(source)
+        document.edit(offset, removed, text[:1])
+        for index, char in enumerate(text[1:], 1):
+            document.edit(offset + index, 0, char)
+        fresh = Document(document.source)
+        if (document.errors() != fresh.errors()
+                or printer.print(document.program()) != printer.print(fresh.program())):
+            raise SystemExit(f"edited document differs from a fresh one for {document.source!r}")
+
+
+def full_parse(source: str):
+    scanner = RegexScanner(source)
+    scanner.scan_tokens()
+    program = Parser(scanner.tokens).parse()
+    Resolver().resolve(program)
+    return program
+
+
+def bench_size(declarations: int, edits: int) -> dict:
+    source = "".join(DECLARATION.format(i=i) for i in range(declarations))
+    document = Document(source)
+    # the digit of the "var" in the middle of the program
+    offset = source.index(f"var a{declarations // 2} = ") + len(f"var a{declarations // 2} = ")
+
+    incremental = []
+    full = []
+    for edit in range(edits):
+        digit = str(edit % 10)
+        start = time.perf_counter()
+        document.edit(offset, 1, digit)
+        incremental.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        full_parse(document.source)
+        full.append(time.perf_counter() - start)
+
+    return {
+        "declarations": declarations,
+        "source_bytes": len(source),
+        "incremental_ms": statistics.median(incremental) * 1000,
+        "full_ms": statistics.median(full) * 1000,
+    }
+
+
+def main():
+    arg_parser = ArgumentParser(description="Benchmark incremental rescanning and reparsing after an edit.")
+    arg_parser.add_argument('--sizes', default="100,1000,10000", help="comma separated numbers of declarations")
+    arg_parser.add_argument('--edits', type=int, default=20, help="edits per size, the median is reported")
+    arg_parser.add_argument('--output', help="write the results to this json file")
+    args = arg_parser.parse_args()
+
+    check_keystrokes()
+    results = {"python": platform.python_version(), "sizes": []}
+    for size in (int(size) for size in args.sizes.split(',')):
+        result = bench_size(size, args.edits)
+        results["sizes"].append(result)
+        print(f"{size:>7} declarations {result['source_bytes']:>9} bytes  "
+              f"incremental {result['incremental_ms']:>8.3f} ms  full {result['full_ms']:>9.3f} ms  "
+              f"({result['full_ms'] / result['incremental_ms']:.0f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Times the scanner, parser and interpreter separately on the synthetic workloads and writes the results as json.
+
+    python benchmarks/run_benchmarks.py --size 20000 --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+    python -m benchmarks.run_benchmarks --parser arena        (from the repository root, same thing)
+
+Each phase is timed --repeat times and the best run is kept. Peak memory is measured with tracemalloc in a
+separate, untimed run, because tracing slows everything down. Workloads the selected parser can't parse (the
+arena parser only takes expressions) are skipped.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+from argparse import ArgumentParser
+
+# the lox package lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lox.session import Session, SCANNERS, PARSERS, ENGINES
+from lox.stats import tree_shape
+from benchmarks.workloads import WORKLOADS
+
+# size of each workload relative to --size, deep nesting is limited by the recursive parser
+SCALE = {
+    "nested_groupings": 0.01,
+}
+
+
+def best_time(function, repeat: int):
+    # returns (fastest wall time, result of the last call)
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(function) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_workload(source: str, scanner: str, parser: str, engine: str, repeat: int) -> dict | None:
+    # None when the parser can't parse the workload
+    # syntax errors are collected instead of printed, they only tell us the workload is skipped
+    session = Session(sink=[])
+    scanner_class = SCANNERS[scanner]
+    parser_class = PARSERS[parser]
+
+    def scan():
+        tokens_scanner = scanner_class(source, session)
+        tokens_scanner.scan_tokens()
+        return tokens_scanner.tokens
+
+    def parse():
+        # the resolver runs as part of parsing, like in Session.parse
+        parser = parser_class(tokens, session)
+        tree = parser.parse()
+        if parser.names:
+            session.resolve(tree)
+        return tree
+
+    scan_time, tokens = best_time(scan, repeat)
+    expr = parse()
+    if expr is None:
+        return None
+    parse_time, expr = best_time(parse, repeat)
+    interpreter = session.engines[engine]
+    run = interpreter.execute_program if type(expr) is list else interpreter.evaluate
+    eval_time, _ = best_time(lambda: run(expr), repeat)
+    nodes = tree_shape(expr)[0]
+
+    return {
+        "source_bytes": len(source),
+        "tokens": len(tokens),
+        "nodes": nodes,
+        "scan": {
+            "seconds": scan_time,
+            "tokens_per_second": len(tokens) / scan_time,
+            "peak_bytes": peak_memory(scan),
+        },
+        "parse": {
+            "seconds": parse_time,
+            "nodes_per_second": nodes / parse_time,
+            "peak_bytes": peak_memory(parse),
+        },
+        "interpret": {
+            "seconds": eval_time,
+            "nodes_per_second": nodes / eval_time,
+            "peak_bytes": peak_memory(lambda: run(expr)),
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(old: dict, new: dict):
+    # prints new time / old time for every phase, > 1 means slower than before
+    print(f"{'workload':<20} {'phase':<10} {'old s':>10} {'new s':>10} {'ratio':>7}")
+    for name, result in new["workloads"].items():
+        if name not in old["workloads"]: continue
+        for phase in ("scan", "parse", "interpret"):
+            before = old["workloads"][name][phase]["seconds"]
+            after = result[phase]["seconds"]
+            print(f"{name:<20} {phase:<10} {before:>10.4f} {after:>10.4f} {after / before:>7.2f}")
+
+
+def main():
+    arg_parser = ArgumentParser(description="Benchmark the lox scanner, parser and interpreter.")
+    arg_parser.add_argument('--size', type=int, default=10000, help="number of terms in each workload")
+    arg_parser.add_argument('--repeat', type=int, default=5, help="timed runs per phase, the best one is kept")
+    arg_parser.add_argument('--workload', action='append', choices=sorted(WORKLOADS),
+                            help="workloads to run (default: all), can be given more than once")
+    arg_parser.add_argument('--scanner', default="default", choices=sorted(SCANNERS))
+    arg_parser.add_argument('--parser', default="recursive", choices=sorted(PARSERS))
+    arg_parser.add_argument('--engine', default="tree", choices=sorted(ENGINES))
+    arg_parser.add_argument('--output', help="write the results to this json file")
+    arg_parser.add_argument('--compare', help="json results of an earlier run to compare against")
+    args = arg_parser.parse_args()
+
+    # the tree walking parser and interpreter recurse once per nesting level
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "size": args.size,
+        "scanner": args.scanner,
+        "parser": args.parser,
+        "engine": args.engine,
+        "workloads": {},
+    }
+    for name in args.workload or sorted(WORKLOADS):
+        source = WORKLOADS[name](max(1, int(args.size * SCALE.get(name, 1))))
+        result = bench_workload(source, args.scanner, args.parser, args.engine, args.repeat)
+        if result is None:
+            print(f"{name:<20} skipped, the {args.parser} parser can't parse it")
+            continue
+        results["workloads"][name] = result
+        print(f"{name:<20} {result['tokens']:>8} tokens {result['nodes']:>8} nodes  "
+              f"scan {result['scan']['tokens_per_second']:>12,.0f} tok/s  "
+              f"parse {result['parse']['nodes_per_second']:>12,.0f} nodes/s  "
+              f"interpret {result['interpret']['nodes_per_second']:>12,.0f} nodes/s")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Measures how long running a one line script takes from a cold interpreter, and how much of it is importing lox.
+
+    python benchmarks/startup.py --output startup.json
+    python benchmarks/startup.py --compare startup.json
+    python benchmarks/startup.py --budget 20
+
+Every run is a fresh `python -X importtime lox/main.py` process; the median of --repeat runs is reported.
+With --budget the script exits with 1 when the median import time of lox is above that many milliseconds.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import statistics
+from argparse import ArgumentParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'lox', 'main.py')
+SCRIPT = "1 + 2\n"
+
+
+def import_times(stderr: str) -> dict:
+    # "import time: self [us] | cumulative | imported package" lines -> module -> cumulative microseconds
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"): continue
+        fields = line[len("import time:"):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit(): continue
+        times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def run_once(script: str) -> tuple[float, dict]:
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', MAIN, script],
+                             capture_output=True, text=True, cwd=ROOT)
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise SystemExit(f"lox exited with {process.returncode}:\n{process.stderr}")
+    return seconds, import_times(process.stderr)
+
+
+def measure(repeat: int) -> dict:
+    with tempfile.NamedTemporaryFile('w', suffix='.lox', delete=False) as file:
+        file.write(SCRIPT)
+    try:
+        # the first run compiles the modules, it isn't counted
+        run_once(file.name)
+        runs = [run_once(file.name) for _ in range(repeat)]
+    finally:
+        os.unlink(file.name)
+
+    # every lox module imported by the run, by the median of its cumulative import time
+    modules = sorted({name for _, times in runs for name in times if name == "lox" or name.startswith("lox.")})
+    module_ms = {name: statistics.median(times.get(name, 0) for _, times in runs) / 1000 for name in modules}
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "wall_ms": statistics.median(seconds for seconds, _ in runs) * 1000,
+        "import_ms": statistics.median(times.get("lox.lox", 0) + times.get("lox", 0) for _, times in runs) / 1000,
+        "modules": module_ms,
+    }
+
+
+def compare(old: dict, new: dict):
+    # new / old, > 1 means slower than before
+    for key in ("wall_ms", "import_ms"):
+        print(f"{key:<10} {old[key]:>8.2f} -> {new[key]:>8.2f} ms  ({new[key] / old[key]:.2f})")
+
+
+def main():
+    arg_parser = ArgumentParser(description="Benchmark the startup time of lox on a one line script.")
+    arg_parser.add_argument('--repeat', type=int, default=15, help="runs to take the median of")
+    arg_parser.add_argument('--output', help="write the results to this json file")
+    arg_parser.add_argument('--compare', help="json results of an earlier run to compare against")
+    arg_parser.add_argument('--budget', type=float, help="fail when importing lox takes longer (ms)")
+    arg_parser.add_argument('--modules', action='store_true', help="also print the import time of every module")
+    args = arg_parser.parse_args()
+
+    results = measure(args.repeat)
+    print(f"wall {results['wall_ms']:.2f} ms  import lox {results['import_ms']:.2f} ms  "
+          f"({len(results['modules'])} lox modules)")
+    if args.modules:
+        for name, ms in results["modules"].items():
+            print(f"  {name:<28} {ms:>7.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+    if args.budget is not None and results["import_ms"] > args.budget:
+        print(f"importing lox took {results['import_ms']:.2f} ms, the budget is {args.budget} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
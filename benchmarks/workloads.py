@@ -0,0 +1,64 @@
+"""
+Generators of synthetic lox sources for the benchmarks.
+Every workload is a single expression whose size is controlled by n, except variables which is a program.
+"""
+import random
+from collections.abc import Callable
+
+
+def flat_plus(n: int) -> str:
+    # 1 + 2 + 3 + ... : a long left associative chain, the widest tree we can make
+    return " + ".join(str(i % 1000) for i in range(1, n + 1))
+
+
+def nested_groupings(n: int) -> str:
+    # ((((1 + 1) + 1) + 1) ...) : n levels of parentheses, the deepest tree we can make
+    return "(" * n + "1" + " + 1)" * n
+
+
+def mixed_arithmetic(n: int) -> str:
+    # every operator and some unary minus, with a fixed seed so runs are comparable
+    rng = random.Random(n)
+    parts = [str(rng.randint(1, 99))]
+    for _ in range(n - 1):
+        parts.append(rng.choice(("+", "-", "*", "/")))
+        parts.append(rng.choice(("", "-")) + str(rng.randint(1, 99)))
+    return " ".join(parts) + " > 0 == true"
+
+
+def string_heavy(n: int) -> str:
+    # concatenation of n string literals of varying length
+    return " + ".join(f'"{"lox" * (i % 7)} string {i}"' for i in range(n))
+
+
+def comment_heavy(n: int) -> str:
+    # mostly comments and blank lines, only every tenth line carries a term
+    lines = []
+    for i in range(n):
+        lines.append(f"// comment line {i}, with some words in it to skip over")
+        if i % 10 == 0:
+            lines.append(f"{i} +")
+    lines.append("0")
+    return "\n".join(lines)
+
+
+def variables(n: int) -> str:
+    # n statements in nested blocks, each reading locals one and two blocks out, a local and a global
+    lines = ["var total = 0;", "{", "  var a = 1;", "  var b = 2;", "  {", "    var c = 3;"]
+    for i in range(n):
+        if i % 2:
+            lines.append("    c = a + b - c;")
+        else:
+            lines.append("    total = total + a * b - c;")
+    lines += ["  }", "}"]
+    return "\n".join(lines)
+
+
+WORKLOADS: dict[str, Callable[[int], str]] = {
+    "flat_plus": flat_plus,
+    "nested_groupings": nested_groupings,
+    "mixed_arithmetic": mixed_arithmetic,
+    "string_heavy": string_heavy,
+    "comment_heavy": comment_heavy,
+    "variables": variables,
+}
@@ -1,5 +1,4 @@
-from typing import List, Any
-from tokens import Token
+from .tokens import Token
 from abc import ABC, abstractmethod
 
 
@@ -20,14 +19,34 @@ class ExprVisitor(ABC):
     def visit_unary_expr(self, expr: 'Expr'):
         pass
 
+    @abstractmethod
+    def visit_assign_expr(self, expr: 'Expr'):
+        pass
+
+    @abstractmethod
+    def visit_variable_expr(self, expr: 'Expr'):
+        pass
+
+    @abstractmethod
+    def visit_call_expr(self, expr: 'Expr'):
+        pass
+
+    @abstractmethod
+    def visit_logical_expr(self, expr: 'Expr'):
+        pass
+
 
 class Expr(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: ExprVisitor):
         pass
 
 
 class Binary(Expr):
+    __slots__ = ('left', 'operator', 'right')
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
@@ -38,6 +57,8 @@ class Binary(Expr):
 
 
 class Grouping(Expr):
+    __slots__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -46,7 +67,9 @@ class Grouping(Expr):
 
 
 class Literal(Expr):
-    def __init__(self, value: Any):
+    __slots__ = ('value',)
+
+    def __init__(self, value: object):
         self.value = value
 
     def accept(self, visitor: ExprVisitor):
@@ -54,6 +77,8 @@ class Literal(Expr):
 
 
 class Unary(Expr):
+    __slots__ = ('operator', 'right')
+
     def __init__(self, operator: Token, right: Expr):
         self.operator = operator
         self.right = right
@@ -62,3 +87,52 @@ class Unary(Expr):
         return visitor.visit_unary_expr(self)
 
 
+class Assign(Expr):
+    __slots__ = ('name', 'value', 'depth', 'slot')
+
+    def __init__(self, name: Token, value: Expr, depth: int = -1, slot: int = -1):
+        self.name = name
+        self.value = value
+        self.depth = depth
+        self.slot = slot
+
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visit_assign_expr(self)
+
+
+class Variable(Expr):
+    __slots__ = ('name', 'depth', 'slot')
+
+    def __init__(self, name: Token, depth: int = -1, slot: int = -1):
+        self.name = name
+        self.depth = depth
+        self.slot = slot
+
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visit_variable_expr(self)
+
+
+class Call(Expr):
+    __slots__ = ('callee', 'paren', 'arguments')
+
+    def __init__(self, callee: Expr, paren: Token, arguments: list[Expr]):
+        self.callee = callee
+        self.paren = paren
+        self.arguments = arguments
+
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visit_call_expr(self)
+
+
+class Logical(Expr):
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visit_logical_expr(self)
+
+
@@ -0,0 +1,141 @@
+from .tokens import Token
+from .Expr import Expr
+from abc import ABC, abstractmethod
+
+
+class StmtVisitor(ABC):
+    @abstractmethod
+    def visit_block_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_expression_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_print_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_var_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_function_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_if_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_return_stmt(self, stmt: 'Stmt'):
+        pass
+
+    @abstractmethod
+    def visit_while_stmt(self, stmt: 'Stmt'):
+        pass
+
+
+class Stmt(ABC):
+    __slots__ = ()
+
+    @abstractmethod
+    def accept(self, visitor: StmtVisitor):
+        pass
+
+
+class Block(Stmt):
+    __slots__ = ('statements', 'size')
+
+    def __init__(self, statements: list[Stmt], size: int = 0):
+        self.statements = statements
+        self.size = size
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_block_stmt(self)
+
+
+class Expression(Stmt):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression: Expr):
+        self.expression = expression
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_expression_stmt(self)
+
+
+class Print(Stmt):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression: Expr):
+        self.expression = expression
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_print_stmt(self)
+
+
+class Var(Stmt):
+    __slots__ = ('name', 'initializer', 'depth', 'slot')
+
+    def __init__(self, name: Token, initializer: Expr | None, depth: int = -1, slot: int = -1):
+        self.name = name
+        self.initializer = initializer
+        self.depth = depth
+        self.slot = slot
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_var_stmt(self)
+
+
+class Function(Stmt):
+    __slots__ = ('name', 'params', 'body', 'depth', 'slot', 'size', 'pooled')
+
+    def __init__(self, name: Token, params: list[Token], body: list[Stmt], depth: int = -1, slot: int = -1, size: int = 0, pooled: bool = False):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.depth = depth
+        self.slot = slot
+        self.size = size
+        self.pooled = pooled
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_function_stmt(self)
+
+
+class If(Stmt):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+
+    def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt | None):
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_if_stmt(self)
+
+
+class Return(Stmt):
+    __slots__ = ('keyword', 'value')
+
+    def __init__(self, keyword: Token, value: Expr | None):
+        self.keyword = keyword
+        self.value = value
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_return_stmt(self)
+
+
+class While(Stmt):
+    __slots__ = ('condition', 'body')
+
+    def __init__(self, condition: Expr, body: Stmt):
+        self.condition = condition
+        self.body = body
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_while_stmt(self)
+
+
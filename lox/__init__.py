@@ -1,3 +1,33 @@
-from lox.lox import Lox
-from lox.scanner import Scanner
-from lox import tokens
+"""
+Lox interpreter.
+The names below are imported on first use, so importing the package (or a single module of it) doesn't load
+the whole interpreter.
+"""
+# public name -> module of the package it lives in, None for the modules themselves
+_EXPORTS = {
+    "Lox": "lox",
+    "Session": "session",
+    "Scanner": "scanner",
+    "evaluate_many": "batch",
+    "EvalService": "aio",
+    "Document": "incremental",
+    "check": "diagnostics",
+    "tokens": None,
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # relative imports, like "from .module import name"
+    module = _EXPORTS[name]
+    if module is None:
+        # importing a submodule sets it as an attribute of the package
+        __import__(f"{__name__}.{name}")
+        value = globals()[name]
+    else:
+        value = getattr(__import__(module, globals(), None, [name], 1), name)
+    globals()[name] = value
+    return value
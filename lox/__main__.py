@@ -0,0 +1,5 @@
+# python -m lox [options] [script] is the same as python lox/main.py
+import sys
+from .main import main
+
+main(sys.argv[1:])
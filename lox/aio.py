@@ -0,0 +1,122 @@
+"""
+asyncio front end: evaluates sources off the event loop, for code embedding lox in an asyncio application.
+
+    async with EvalService(workers=4, timeout=0.5, max_nodes=10000) as service:
+        result = await service.evaluate("1 + 2")      # EvalResult or EvalError, see batch.py
+
+Nothing is printed and no state is shared between requests, every result says what happened.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from collections.abc import Iterable
+from .batch import Batch, EvalResult, EvalError
+
+# the Batch objects of the executor thread (or process) we're running in, by their options
+local = threading.local()
+
+
+def evaluate_source(source: str, options: tuple) -> EvalResult | EvalError:
+    # runs in the executor; every worker thread or process keeps its own Batch, they are not thread safe
+    batches = getattr(local, 'batches', None)
+    if batches is None:
+        batches = local.batches = {}
+    batch = batches.get(options)
+    if batch is None:
+        batch = batches[options] = Batch(*options)
+    return batch.evaluate(source)
+
+
+class EvalService:
+    """
+    Runs scan, parse and evaluate of every request in an executor, at most workers at a time.
+    Requests wait in a queue of queue_size entries; once it is full, evaluate() waits for room, which pushes
+    back on callers producing faster than the workers can evaluate.
+    Every request gets a budget: a tree with more than max_nodes nodes is refused with an EvalError of kind
+    "budget", and a request that runs longer than timeout seconds gets an EvalError of kind "timeout".
+    A running evaluation can't be interrupted: after a timeout it keeps its executor worker until it is done,
+    and requests waiting for that worker count the wait against their own timeout. max_nodes is what bounds
+    the work of a single request. With process=True the workers are processes, so slow requests don't compete
+    for the GIL.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 64, timeout: float | None = None,
+                 max_nodes: int | None = None, scanner: str = "regex", engine: str = "tree",
+                 optimize: bool = False, cache: bool = False, process: bool = False,
+                 executor: Executor | None = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.options = (scanner, engine, optimize, cache, max_nodes)
+        # an executor passed in belongs to the caller and is left running by close()
+        self.owns_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(workers) if process else ThreadPoolExecutor(workers, "lox-eval")
+        self.executor = executor
+        self.queue: asyncio.Queue | None = None
+        self.tasks: list[asyncio.Task] = []
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start(self):
+        # the queue and the worker tasks belong to the running event loop, so they are made on first use
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.queue_size)
+            self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def evaluate(self, source: str) -> EvalResult | EvalError:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((source, future))
+        return await future
+
+    async def evaluate_many(self, sources: Iterable[str]) -> list[EvalResult | EvalError]:
+        # results are in the order of sources
+        return await asyncio.gather(*(self.evaluate(source) for source in sources))
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            source, future = await self.queue.get()
+            try:
+                if future.done():
+                    # the caller gave up while the request was queued
+                    continue
+                running = loop.run_in_executor(self.executor, evaluate_source, source, self.options)
+                try:
+                    result = await asyncio.wait_for(running, self.timeout)
+                except asyncio.TimeoutError:
+                    message = f"Evaluation took longer than {self.timeout} seconds."
+                    result = EvalError("timeout", 0, message, [message])
+                except asyncio.CancelledError:
+                    # the service is closing
+                    future.cancel()
+                    raise
+                except Exception as error:
+                    # a crash of the interpreter itself goes to the caller
+                    if not future.done():
+                        future.set_exception(error)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        # stops the workers, requests still queued are cancelled
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.queue is not None:
+            while not self.queue.empty():
+                source, future = self.queue.get_nowait()
+                future.cancel()
+            self.queue = None
+        if self.owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
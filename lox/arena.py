@@ -0,0 +1,161 @@
+from array import array
+from collections.abc import Iterable
+from typing import Any
+from . import Expr
+from .tokens import Token, FIXED_LEXEMES, NO_LITERAL
+from .token_type import TokenType
+from .errors import ErrorReporter
+from .iterative_parser import IterativeParser, IterativeStreamParser, MAX_DEPTH
+
+# node kinds
+LITERAL = 0
+GROUPING = 1
+UNARY = 2
+BINARY = 3
+
+# operator codes stored in Arena.operators are indexes into this tuple
+OPERATORS: tuple[TokenType, ...] = (
+    TokenType.MINUS, TokenType.PLUS, TokenType.SLASH, TokenType.STAR, TokenType.BANG,
+    TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL,
+    TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+)
+OPERATOR_CODES = {token_type: code for code, token_type in enumerate(OPERATORS)}
+# one shared token per operator, for code that only needs the operator's type
+# the tokens of a particular node, with its line, are made by Arena.token(node)
+OPERATOR_TOKENS = tuple(Token(token_type, FIXED_LEXEMES[token_type], NO_LITERAL, 0) for token_type in OPERATORS)
+
+
+class Arena(Expr.Expr):
+    """
+    A whole expression tree stored in parallel typed arrays, one entry per node, instead of one object per node.
+    Node i has kind kinds[i], operator code operators[i] (unary and binary nodes), children left[i] and right[i]
+    (left only for groupings and unary nodes) and source line lines[i]. For literals left[i] is the index of
+    the value in literals.
+    Nodes are appended after their children, so the arrays are in post order and the root is the last node:
+    evaluating them front to back with a value stack is evaluating the tree.
+    """
+    __slots__ = ('kinds', 'operators', 'left', 'right', 'lines', 'literals')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.operators = array('B')
+        self.left = array('i')
+        self.right = array('i')
+        self.lines = array('i')
+        self.literals: list[Any] = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, kind, operator, left, right, line) -> int:
+        self.kinds.append(kind)
+        self.operators.append(operator)
+        self.left.append(left)
+        self.right.append(right)
+        self.lines.append(line)
+        return len(self.kinds) - 1
+
+    def add_literal(self, index, line) -> int:
+        return self.add(LITERAL, 0, index, -1, line)
+
+    def token(self, node: int) -> Token:
+        # the operator token of a unary or binary node, rebuilt for error messages
+        token_type = OPERATORS[self.operators[node]]
+        return Token(token_type, FIXED_LEXEMES[token_type], NO_LITERAL, self.lines[node])
+
+    def accept(self, visitor: Expr.ExprVisitor):
+        # visitors that know arenas walk the arrays directly, the others get the equivalent tree of nodes
+        visit = getattr(visitor, 'visit_arena_expr', None)
+        if visit is None:
+            return self.to_expr().accept(visitor)
+        return visit(self)
+
+    def to_expr(self) -> Expr.Expr:
+        # builds the equivalent tree of Expr nodes
+        nodes = []
+        for node, kind in enumerate(self.kinds):
+            if kind == LITERAL:
+                nodes.append(Expr.Literal(self.literals[self.left[node]]))
+            elif kind == GROUPING:
+                nodes.append(Expr.Grouping(nodes.pop()))
+            elif kind == UNARY:
+                nodes.append(Expr.Unary(self.token(node), nodes.pop()))
+            else:
+                right = nodes.pop()
+                nodes.append(Expr.Binary(nodes.pop(), self.token(node), right))
+        return nodes.pop()
+
+    def shape(self) -> tuple[int, int]:
+        # (number of nodes, depth), children always come before their parent
+        depths = array('i')
+        kinds, left, right = self.kinds, self.left, self.right
+        for node, kind in enumerate(kinds):
+            if kind == LITERAL:
+                depths.append(1)
+            elif kind == BINARY:
+                depths.append(1 + max(depths[left[node]], depths[right[node]]))
+            else:
+                depths.append(1 + depths[left[node]])
+        return len(kinds), depths[-1] if depths else 0
+
+
+class ArenaParser(IterativeParser):
+    """
+    IterativeParser building an Arena instead of Expr nodes, parse() returns the arena.
+    Equal literal values are stored once in the arena. Statements, variables, calls and the logical
+    operators are reported as syntax errors.
+    """
+
+    def __init__(self, tokens: list[Token], reporter: ErrorReporter | None = None, max_depth: int = MAX_DEPTH):
+        super().__init__(tokens, reporter, max_depth)
+        self.arena = Arena()
+        # (type, value) -> index into arena.literals, only needed while parsing
+        self.literal_index = {}
+
+    def parse(self):
+        self.arena = Arena()
+        self.literal_index = {}
+        try:
+            if super().parse() is None: return None
+            return self.arena
+        finally:
+            self.literal_index = {}
+
+    def make_literal(self, token, value):
+        key = (type(value), value)
+        index = self.literal_index.get(key)
+        if index is None:
+            index = self.literal_index[key] = len(self.arena.literals)
+            self.arena.literals.append(value)
+        return self.arena.add_literal(index, token.line)
+
+    def make_grouping(self, paren, expression):
+        return self.arena.add(GROUPING, 0, expression, -1, paren.line)
+
+    def make_unary(self, operator, right):
+        return self.arena.add(UNARY, OPERATOR_CODES[operator.type], right, -1, operator.line)
+
+    def make_binary(self, left, operator, right):
+        return self.arena.add(BINARY, OPERATOR_CODES[operator.type], left, right, operator.line)
+
+    # an arena is the tree of one expression of literals and operators
+    def make_variable(self, name):
+        raise self.error(name, "The arena parser doesn't support variables.")
+
+    def make_logical(self, left, operator, right):
+        raise self.error(operator, "The arena parser doesn't support 'and' and 'or'.")
+
+    def open_call(self, paren):
+        raise self.error(paren, "The arena parser doesn't support calls.")
+
+    def program(self, statements):
+        # after a syntax error in the expression whatever follows it was skipped, not parsed
+        if self.error_count: return statements
+        raise self.error(self.peek(), "The arena parser only parses a single expression.")
+
+
+class ArenaStreamParser(ArenaParser, IterativeStreamParser):
+    """ArenaParser pulling its tokens lazily from an iterator, like StreamParser."""
+
+    def __init__(self, tokens: Iterable[Token], reporter: ErrorReporter | None = None, max_depth: int = MAX_DEPTH):
+        super().__init__(tokens, reporter, max_depth)
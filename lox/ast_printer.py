@@ -1,29 +1,181 @@
-import Expr
-from tokens import Token
-from token_type import TokenType
+from . import Expr, Stmt
+from .tokens import Token
+from .token_type import TokenType
 
 
-class AstPrinter(Expr.ExprVisitor):
-    def print(self, expr: Expr.Expr):
-        return expr.accept(self)
+class AstPrinter(Expr.ExprVisitor, Stmt.StmtVisitor):
+    """
+    Prints a tree as nested s-expressions, the statements of a program one per line.
+    The tree is walked with an explicit stack and the output is written piece by piece into one buffer, joined
+    at the end, so printing is linear in the size of the output and works on trees of any depth.
+    """
 
-    def visit_binary_expr(self, expr: 'Expr'):
-        return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
+    def print(self, tree) -> str:
+        # tree is a program (list of statements) or a single expression
+        parts = []
+        if type(tree) is list:
+            for statement in tree:
+                if parts: parts.append('\n')
+                self.write(statement, parts)
+        else:
+            self.write(tree, parts)
+        return ''.join(parts)
 
-    def visit_grouping_expr(self, expr: 'Expr'):
-        return self.parenthesize("group", expr.expression)
+    def write(self, node: Expr.Expr | Stmt.Stmt, parts: list[str]):
+        # appends the printed expression or statement to parts
+        # the stack holds nodes still to print and the strings that close them, popped in output order
+        append = parts.append
+        work = [node]
+        while work:
+            node = work.pop()
+            kind = type(node)
+            if kind is str:
+                append(node)
+            elif kind is Expr.Literal:
+                append(self.literal(node.value))
+            elif kind is Expr.Binary:
+                append(f'({node.operator.lexeme} ')
+                work += (')', node.right, ' ', node.left)
+            elif kind is Expr.Grouping:
+                append('(group ')
+                work += (')', node.expression)
+            elif kind is Expr.Unary:
+                append(f'({node.operator.lexeme} ')
+                work += (')', node.right)
+            elif kind is Expr.Variable:
+                append(node.name.lexeme)
+            elif kind is Expr.Assign:
+                append(f'(= {node.name.lexeme} ')
+                work += (')', node.value)
+            elif kind is Expr.Logical:
+                append(f'({node.operator.lexeme} ')
+                work += (')', node.right, ' ', node.left)
+            elif kind is Expr.Call:
+                append('(call ')
+                work.append(')')
+                for argument in reversed(node.arguments):
+                    work += (argument, ' ')
+                work.append(node.callee)
+            elif kind is Stmt.Expression:
+                append('(; ')
+                work += (')', node.expression)
+            elif kind is Stmt.Print:
+                append('(print ')
+                work += (')', node.expression)
+            elif kind is Stmt.Var:
+                append(f'(var {node.name.lexeme}')
+                work.append(')')
+                if node.initializer is not None:
+                    work += (node.initializer, ' ')
+            elif kind is Stmt.Block:
+                append('(block')
+                work.append(')')
+                for statement in reversed(node.statements):
+                    work += (statement, ' ')
+            elif kind is Stmt.Function:
+                params = ' '.join(param.lexeme for param in node.params)
+                append(f'(fun {node.name.lexeme} ({params})')
+                work.append(')')
+                for statement in reversed(node.body):
+                    work += (statement, ' ')
+            elif kind is Stmt.If:
+                append('(if ')
+                work.append(')')
+                if node.else_branch is not None:
+                    work += (node.else_branch, ' ')
+                work += (node.then_branch, ' ', node.condition)
+            elif kind is Stmt.Return:
+                append('(return')
+                work.append(')')
+                if node.value is not None:
+                    work += (node.value, ' ')
+            elif kind is Stmt.While:
+                append('(while ')
+                work += (')', node.body, ' ', node.condition)
+            else:
+                # arenas and nodes this walk doesn't know print themselves
+                append(node.accept(self))
 
-    def visit_literal_expr(self, expr: 'Expr'):
-        if expr.value is None: return "nil"
-        return str(expr.value)
+    def visit_binary_expr(self, expr: Expr.Binary):
+        return self.print(expr)
 
-    def visit_unary_expr(self, expr: 'Expr'):
-        return self.parenthesize(expr.operator.lexeme, expr.right)
+    def visit_grouping_expr(self, expr: Expr.Grouping):
+        return self.print(expr)
 
-    def parenthesize(self, name, *exprs):
-        string = ' '.join(expr.accept(self) for expr in exprs)
+    def visit_literal_expr(self, expr: Expr.Literal):
+        return self.literal(expr.value)
 
-        return f'({name} {string})'
+    def visit_unary_expr(self, expr: Expr.Unary):
+        return self.print(expr)
+
+    def visit_variable_expr(self, expr: Expr.Variable):
+        return expr.name.lexeme
+
+    def visit_assign_expr(self, expr: Expr.Assign):
+        return self.print(expr)
+
+    def visit_logical_expr(self, expr: Expr.Logical):
+        return self.print(expr)
+
+    def visit_call_expr(self, expr: Expr.Call):
+        return self.print(expr)
+
+    def visit_block_stmt(self, stmt: Stmt.Block):
+        return self.print([stmt])
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression):
+        return self.print([stmt])
+
+    def visit_print_stmt(self, stmt: Stmt.Print):
+        return self.print([stmt])
+
+    def visit_var_stmt(self, stmt: Stmt.Var):
+        return self.print([stmt])
+
+    def visit_function_stmt(self, stmt: Stmt.Function):
+        return self.print([stmt])
+
+    def visit_if_stmt(self, stmt: Stmt.If):
+        return self.print([stmt])
+
+    def visit_return_stmt(self, stmt: Stmt.Return):
+        return self.print([stmt])
+
+    def visit_while_stmt(self, stmt: Stmt.While):
+        return self.print([stmt])
+
+    def literal(self, value):
+        if value is None: return "nil"
+        if value is True: return "true"
+        if value is False: return "false"
+        return str(value)
+
+    def visit_arena_expr(self, expr: 'arena.Arena'):
+        # same walk over node indexes, starting at the root (the last node)
+        from . import arena
+        kinds, operators, left, right, literals = expr.kinds, expr.operators, expr.left, expr.right, expr.literals
+        lexemes = [token.lexeme for token in arena.OPERATOR_TOKENS]
+        parts = []
+        append = parts.append
+        work = [len(kinds) - 1]
+        while work:
+            node = work.pop()
+            if type(node) is str:
+                append(node)
+                continue
+            kind = kinds[node]
+            if kind == arena.LITERAL:
+                append(self.literal(literals[left[node]]))
+            elif kind == arena.GROUPING:
+                append('(group ')
+                work += (')', left[node])
+            elif kind == arena.UNARY:
+                append(f'({lexemes[operators[node]]} ')
+                work += (')', left[node])
+            else:
+                append(f'({lexemes[operators[node]]} ')
+                work += (')', right[node], ' ', left[node])
+        return ''.join(parts)
 
 
 if __name__ == '__main__':
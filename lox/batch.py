@@ -0,0 +1,135 @@
+from collections.abc import Iterable
+from typing import Any
+from .parser import Parser
+from .runtime_error import LoxRuntimeError
+from .rope import Rope
+from .parse_cache import source_key
+from .session import Session, SCANNERS
+from .stats import tree_shape
+
+
+class EvalResult:
+    """
+    Successful evaluation of one source: the lox value and its printed form.
+    """
+    __slots__ = ('value', 'text')
+
+    def __init__(self, value: Any, text: str):
+        self.value = value
+        self.text = text
+
+    def __repr__(self):
+        return f"EvalResult({self.text!r})"
+
+
+class EvalError:
+    """
+    Failed evaluation of one source. kind is "syntax" (scanner or parser errors), "runtime", "budget" (the
+    expression is larger than max_nodes) or, from aio.EvalService, "timeout".
+    line and message belong to the first error, messages holds every error formatted the way Lox prints it.
+    Errors that don't come from the source have line 0.
+    """
+    __slots__ = ('kind', 'line', 'message', 'messages')
+
+    def __init__(self, kind: str, line: int, message: str, messages: list[str]):
+        self.kind = kind
+        self.line = line
+        self.message = message
+        self.messages = messages
+
+    def __repr__(self):
+        return f"EvalError({self.kind!r}, line={self.line}, {self.message!r})"
+
+
+class Batch:
+    """
+    Evaluates many independent expressions with one scanner, parser and interpreter, reset between sources
+    instead of rebuilt. A source has to be a single expression, statements are syntax errors.
+    Nothing is printed: every source produces an EvalResult or an EvalError.
+    A Batch has its own session, separate batches can run in parallel threads.
+    With max_nodes set, sources whose tree has more nodes are refused instead of evaluated.
+    """
+
+    def __init__(self, scanner: str = "regex", engine: str = "tree", optimize: bool = False,
+                 cache: bool = False, max_nodes: int | None = None):
+        # syntax errors of the current source are collected here instead of being printed
+        self.errors = []
+        self.session = Session(sink=self.errors)
+        self.scanner = SCANNERS[scanner]("", self.session)
+        self.scanner_name = scanner
+        self.parser = Parser([], self.session)
+        self.interpreter = self.session.engines[engine]
+        self.optimize = optimize
+        self.cache = cache
+        self.max_nodes = max_nodes
+
+    def parse(self, source: str):
+        self.scanner.reset(source)
+        self.scanner.scan_tokens()
+        self.parser.reset(self.scanner.tokens)
+        expression = self.parser.parse_expression()
+        if self.session.had_error: return None
+        if self.parser.names:
+            self.session.resolve(expression)
+            if self.session.had_error: return None
+        if self.optimize:
+            expression = self.session.optimizer.optimize(expression)
+        return expression
+
+    def evaluate(self, source: str) -> EvalResult | EvalError:
+        errors = self.errors
+        errors.clear()
+        self.session.reset()
+
+        expression = None
+        if self.cache:
+            key = source_key(source, self.optimize, self.scanner_name)
+            expression = self.session.parse_cache.get(key)
+            if type(expression) is list:
+                # the cache is shared with sessions, which also store programs
+                expression = None
+        if expression is None:
+            try:
+                expression = self.parse(source)
+            except RecursionError:
+                # the recursive parser can't take a source nested this deep
+                message = "Expression nests too deeply."
+                return EvalError("syntax", 0, message, [message])
+            if expression is None:
+                line, where, message = errors[0]
+                return EvalError("syntax", line, message,
+                                 [f"[line {line}] Error{where}: {message}" for line, where, message in errors])
+            if self.cache:
+                self.session.parse_cache.put(key, expression)
+
+        if self.max_nodes is not None:
+            nodes = tree_shape(expression)[0]
+            if nodes > self.max_nodes:
+                message = f"Expression has {nodes} nodes, the limit is {self.max_nodes}."
+                return EvalError("budget", 0, message, [message])
+
+        try:
+            value = self.interpreter.evaluate(expression)
+        except LoxRuntimeError as error:
+            return EvalError("runtime", error.token.line, str(error),
+                             [f"{error}\n[line {error.token.line}]"])
+        except RecursionError:
+            # a tree too deep for a recursive engine fails this source only, not the whole batch
+            message = "Stack overflow."
+            return EvalError("runtime", 0, message, [message])
+        text = self.interpreter.stringify(value)
+        # a long string is a rope until stringify joined it, callers get the str
+        return EvalResult(text if type(value) is Rope else value, text)
+
+    def evaluate_many(self, sources: Iterable[str]) -> list[EvalResult | EvalError]:
+        evaluate = self.evaluate
+        return [evaluate(source) for source in sources]
+
+
+def evaluate_many(sources: Iterable[str], scanner: str = "regex", engine: str = "tree", optimize: bool = False,
+                  cache: bool = False) -> list[EvalResult | EvalError]:
+    """
+    Scans, parses and evaluates every source as an independent expression.
+    Returns one EvalResult or EvalError per source, in the same order.
+    """
+    return Batch(scanner, engine, optimize, cache).evaluate_many(sources)
@@ -0,0 +1,212 @@
+from array import array
+from typing import Any
+from . import Expr
+from .tokens import Token
+from .token_type import TokenType
+
+# opcodes, plain ints so the vm loop compares small integers instead of enum members
+OP_CONSTANT = 0  # operand: index into the constant pool
+OP_ADD = 1
+OP_SUBTRACT = 2
+OP_MULTIPLY = 3
+OP_DIVIDE = 4
+OP_GREATER = 5
+OP_GREATER_EQUAL = 6
+OP_LESS = 7
+OP_LESS_EQUAL = 8
+OP_EQUAL = 9
+OP_NOT_EQUAL = 10
+OP_NEGATE = 11
+OP_NOT = 12
+OP_POP = 13
+OP_NIL = 14
+OP_RETURN = 15
+OP_GET_VARIABLE = 16  # operand: index into the constant pool of the Variable node
+OP_SET_VARIABLE = 17  # operand: index into the constant pool of the Assign node
+OP_CALL = 18  # operand: number of arguments, on the stack above the callee
+OP_JUMP_IF_FALSE_OR_POP = 19  # operand: offset to jump to when the top of the stack is falsey, kept for the jump
+OP_JUMP_IF_TRUE_OR_POP = 20  # operand: offset to jump to when the top of the stack is truthy, kept for the jump
+
+OP_NAMES = [
+    'OP_CONSTANT', 'OP_ADD', 'OP_SUBTRACT', 'OP_MULTIPLY', 'OP_DIVIDE', 'OP_GREATER', 'OP_GREATER_EQUAL',
+    'OP_LESS', 'OP_LESS_EQUAL', 'OP_EQUAL', 'OP_NOT_EQUAL', 'OP_NEGATE', 'OP_NOT', 'OP_POP', 'OP_NIL',
+    'OP_RETURN', 'OP_GET_VARIABLE', 'OP_SET_VARIABLE', 'OP_CALL', 'OP_JUMP_IF_FALSE_OR_POP',
+    'OP_JUMP_IF_TRUE_OR_POP',
+]
+
+BINARY_OPS: dict[TokenType, int] = {
+    TokenType.PLUS: OP_ADD,
+    TokenType.MINUS: OP_SUBTRACT,
+    TokenType.STAR: OP_MULTIPLY,
+    TokenType.SLASH: OP_DIVIDE,
+    TokenType.GREATER: OP_GREATER,
+    TokenType.GREATER_EQUAL: OP_GREATER_EQUAL,
+    TokenType.LESS: OP_LESS,
+    TokenType.LESS_EQUAL: OP_LESS_EQUAL,
+    TokenType.EQUAL_EQUAL: OP_EQUAL,
+    TokenType.BANG_EQUAL: OP_NOT_EQUAL,
+}
+
+UNARY_OPS: dict[TokenType, int] = {
+    TokenType.MINUS: OP_NEGATE,
+    TokenType.BANG: OP_NOT,
+}
+
+
+class Chunk:
+    """
+    A compiled expression: the instruction stream, the constants it refers to and the source line of every
+    instruction. Instructions that can fail also remember their operator token, for runtime error reporting.
+    """
+    __slots__ = ('code', 'constants', 'lines', 'tokens', 'constant_index')
+
+    def __init__(self):
+        self.code = array('I')
+        self.lines = array('I')
+        self.constants: list[Any] = []
+        # offset of the instruction -> operator token
+        self.tokens: dict[int, Token] = {}
+        # (type, repr) of a constant -> its index, so repeated literals share one slot in the pool
+        self.constant_index: dict[tuple, int] = {}
+
+    def write(self, byte: int, line: int):
+        self.code.append(byte)
+        self.lines.append(line)
+
+    def add_constant(self, value: Any) -> int:
+        # keyed on repr too, so 0 and -0 or 1 and true don't collapse into one constant
+        key = (type(value), repr(value))
+        index = self.constant_index.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constant_index[key] = index
+        return index
+
+
+class Compiler(Expr.ExprVisitor):
+    """
+    Compiles an expression tree to a Chunk of stack machine code, operands first, then the operator,
+    so it can be executed by the VM without walking the tree.
+    """
+
+    def __init__(self):
+        self.chunk = None
+        # line of the last emitted instruction, literals don't carry a token so they inherit it
+        self.line = 1
+
+    def compile(self, expr: Expr.Expr) -> Chunk:
+        self.chunk = Chunk()
+        self.line = 1
+        expr.accept(self)
+        self.chunk.write(OP_RETURN, self.line)
+        chunk, self.chunk = self.chunk, None
+        return chunk
+
+    def emit_operator(self, op: int, operator: Token):
+        self.line = operator.line
+        self.chunk.tokens[len(self.chunk.code)] = operator
+        self.chunk.write(op, operator.line)
+
+    def visit_literal_expr(self, expr: 'Expr.Literal'):
+        self.chunk.write(OP_CONSTANT, self.line)
+        self.chunk.write(self.chunk.add_constant(expr.value), self.line)
+
+    def visit_grouping_expr(self, expr: 'Expr.Grouping'):
+        # groupings only shape the tree, they don't produce any code
+        expr.expression.accept(self)
+
+    def visit_arena_expr(self, expr: 'arena.Arena'):
+        # the nodes are in post order, the order their code runs in, so one pass over the arrays compiles them
+        from . import arena
+        chunk = self.chunk
+        literals, operators, left, lines = expr.literals, expr.operators, expr.left, expr.lines
+        for node, kind in enumerate(expr.kinds):
+            if kind == arena.LITERAL:
+                self.line = lines[node]
+                chunk.write(OP_CONSTANT, self.line)
+                chunk.write(chunk.add_constant(literals[left[node]]), self.line)
+            elif kind == arena.BINARY:
+                self.emit_operator(BINARY_OPS[arena.OPERATORS[operators[node]]], expr.token(node))
+            elif kind == arena.UNARY:
+                self.emit_operator(UNARY_OPS[arena.OPERATORS[operators[node]]], expr.token(node))
+            # a grouping produces no code
+
+    def visit_unary_expr(self, expr: 'Expr.Unary'):
+        expr.right.accept(self)
+        op = UNARY_OPS.get(expr.operator.type)
+        if op is None:
+            # unknown operator evaluates its operand and produces nil, like the tree walker
+            self.chunk.write(OP_POP, expr.operator.line)
+            self.chunk.write(OP_NIL, expr.operator.line)
+            return
+        self.emit_operator(op, expr.operator)
+
+    def visit_binary_expr(self, expr: 'Expr.Binary'):
+        expr.left.accept(self)
+        expr.right.accept(self)
+        op = BINARY_OPS.get(expr.operator.type)
+        if op is None:
+            self.chunk.write(OP_POP, expr.operator.line)
+            self.chunk.write(OP_POP, expr.operator.line)
+            self.chunk.write(OP_NIL, expr.operator.line)
+            return
+        self.emit_operator(op, expr.operator)
+
+    def visit_variable_expr(self, expr: 'Expr.Variable'):
+        # the node itself is the operand, the vm reads the variable at the slot the resolver stored on it
+        self.line = expr.name.line
+        self.chunk.write(OP_GET_VARIABLE, self.line)
+        self.chunk.write(self.chunk.add_constant(expr), self.line)
+
+    def visit_assign_expr(self, expr: 'Expr.Assign'):
+        expr.value.accept(self)
+        self.line = expr.name.line
+        self.chunk.write(OP_SET_VARIABLE, self.line)
+        self.chunk.write(self.chunk.add_constant(expr), self.line)
+
+    def visit_logical_expr(self, expr: 'Expr.Logical'):
+        # the left value is the result when it decides, otherwise it is popped and the right one is evaluated
+        expr.left.accept(self)
+        self.line = expr.operator.line
+        op = OP_JUMP_IF_TRUE_OR_POP if expr.operator.type == TokenType.OR else OP_JUMP_IF_FALSE_OR_POP
+        self.chunk.write(op, self.line)
+        jump = len(self.chunk.code)
+        self.chunk.write(0, self.line)
+        expr.right.accept(self)
+        # patched once the end of the right operand is known
+        self.chunk.code[jump] = len(self.chunk.code)
+
+    def visit_call_expr(self, expr: 'Expr.Call'):
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+        self.emit_operator(OP_CALL, expr.paren)
+        self.chunk.write(len(expr.arguments), self.line)
+
+
+def disassemble(chunk: Chunk) -> str:
+    # human readable listing of a chunk, for debugging the compiler
+    lines = []
+    offset = 0
+    while offset < len(chunk.code):
+        op = chunk.code[offset]
+        prefix = f"{offset:04d} {chunk.lines[offset]:4d} {OP_NAMES[op]}"
+        if op == OP_CONSTANT:
+            index = chunk.code[offset + 1]
+            lines.append(f"{prefix:<28} {index:4d} {chunk.constants[index]!r}")
+            offset += 2
+        elif op == OP_GET_VARIABLE or op == OP_SET_VARIABLE:
+            index = chunk.code[offset + 1]
+            lines.append(f"{prefix:<28} {index:4d} '{chunk.constants[index].name.lexeme}'")
+            offset += 2
+        elif op == OP_CALL:
+            lines.append(f"{prefix:<28} {chunk.code[offset + 1]:4d} arguments")
+            offset += 2
+        elif op == OP_JUMP_IF_FALSE_OR_POP or op == OP_JUMP_IF_TRUE_OR_POP:
+            lines.append(f"{prefix:<28} -> {chunk.code[offset + 1]:04d}")
+            offset += 2
+        else:
+            lines.append(prefix)
+            offset += 1
+    return "\n".join(lines)
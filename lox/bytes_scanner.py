@@ -0,0 +1,111 @@
+import os
+import re
+import mmap
+from contextlib import contextmanager
+from typing import BinaryIO
+from .token_type import TokenType
+from .tokens import Token, KEYWORDS, FIXED_LEXEMES, NO_LITERAL
+from .regex_scanner import RegexScanner, OPERATORS
+
+# TOKEN_PATTERN over utf-8 bytes. Everything but string contents is ascii, so lexemes are matched on the raw
+# bytes and only what ends up in a token gets decoded.
+# Line ends are matched the way a file opened in text mode translates them: "\r\n", "\r" and "\n".
+BYTES_TOKEN_PATTERN = re.compile(rb"""
+    (?P<whitespace>[ \t]+)
+  | (?P<newline>\r\n|\r|\n)
+  | (?P<comment>//[^\r\n]*)
+  | (?P<number>[0-9]+(?:\.[0-9]+)?)
+  | (?P<identifier>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<string>"[^"]*")
+  | (?P<unterminated>"[^"]*)
+  | (?P<operator>==|!=|<=|>=|[(){},.\-+;*/=!<>])
+  | (?P<error>[\xc0-\xff][\x80-\xbf]*|.)
+""", re.VERBOSE)
+
+BYTES_OPERATORS = {lexeme.encode('ascii'): token_type for lexeme, token_type in OPERATORS.items()}
+BYTES_KEYWORDS = {lexeme.encode('ascii'): token_type for lexeme, token_type in KEYWORDS.items()}
+
+
+class BytesScanner(RegexScanner):
+    """
+    RegexScanner working on utf-8 encoded bytes, e.g. a memory mapped file (see map_file), so a script never
+    has to be decoded into one big str. Operators and keywords are looked up by their bytes and get the shared
+    lexemes, only identifiers, numbers and strings are decoded.
+    It produces the same tokens as RegexScanner does for the text of the file read in text mode.
+    """
+
+    def reset(self, source):
+        # str sources are encoded, which copies them, so the scanner can also be used on plain strings
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        super().reset(source)
+
+    def iter_tokens(self):
+        reporter = self.reporter
+        operators = BYTES_OPERATORS
+        keywords = BYTES_KEYWORDS
+        lexemes = FIXED_LEXEMES
+        line = self.line
+
+        for match in BYTES_TOKEN_PATTERN.finditer(self.source):
+            kind = match.lastgroup
+            if kind == 'whitespace' or kind == 'comment':
+                continue
+            text = match.group()
+            if kind == 'operator':
+                token_type = operators[text]
+                yield Token(token_type, lexemes[token_type], NO_LITERAL, line)
+            elif kind == 'identifier':
+                token_type = keywords.get(text)
+                if token_type is None:
+                    yield Token(TokenType.IDENTIFIER, text.decode('ascii'), NO_LITERAL, line)
+                else:
+                    yield Token(token_type, lexemes[token_type], NO_LITERAL, line)
+            elif kind == 'number':
+                yield Token(TokenType.NUMBER, text.decode('ascii'), float(text), line)
+            elif kind == 'newline':
+                line += 1
+            elif kind == 'string':
+                text = self.decode(text)
+                line += text.count("\n")
+                yield Token(TokenType.STRING, text, text[1:-1], line)
+            elif kind == 'unterminated':
+                line += self.decode(text).count("\n")
+                # offsets of errors are in bytes
+                reporter.scanner_error(line, "Unterminated string.", match.start())
+            else:
+                reporter.scanner_error(line, f"Unexpected character: {text.decode('utf-8', 'replace')}",
+                                       match.start())
+
+        self.line = line
+        self.start = self.current = len(self.source)
+        yield Token(TokenType.EOF, "", NO_LITERAL, line)
+
+    @staticmethod
+    def decode(text: bytes) -> str:
+        # strings may contain any utf-8 and span lines, their line ends are translated like in text mode
+        text = text.decode('utf-8')
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+
+@contextmanager
+def map_file(file: BinaryIO):
+    """
+    Maps a file opened in binary mode read only into memory, for BytesScanner.
+    Pages are read by the OS as the scanner gets to them and nothing is copied into the process.
+    """
+    # empty files can't be mapped
+    if os.fstat(file.fileno()).st_size == 0:
+        yield b""
+        return
+    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield buffer
+    finally:
+        try:
+            buffer.close()
+        except BufferError:
+            # something (e.g. an unfinished scan) still points into the mapping, it is unmapped once collected
+            pass
@@ -0,0 +1,77 @@
+"""
+Thin client of the lox server (see server.py): sends one script to a running server and prints what it printed.
+
+    python main.py --serve &
+    python client.py script.lox
+    echo '1 + 2' | python client.py -
+
+It only imports the standard library, so a call costs python's startup and one round trip to the server instead
+of importing and warming up the whole interpreter.
+"""
+import os
+import sys
+import json
+import socket
+
+# where the server listens unless told otherwise, shared with server.py
+DEFAULT_SOCKET = os.environ.get("LOX_SOCKET") or f"/tmp/lox-{os.getuid()}.sock"
+
+# exit status when the server can't be reached (EX_UNAVAILABLE)
+UNAVAILABLE = 69
+
+
+def request(message: dict, path: str = DEFAULT_SOCKET) -> dict:
+    # sends one request and waits for its response
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        with connection.makefile('rw', encoding='utf-8') as stream:
+            stream.write(json.dumps(message) + "\n")
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def main(args: list[str]) -> int:
+    # options are --socket=PATH, --scanner=NAME, --parser=NAME, --engine=NAME, --optimize and --print-ast
+    # parsed by hand, importing argparse would cost more than the request itself
+    path = DEFAULT_SOCKET
+    message = {}
+    scripts = []
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name == '--socket' and value:
+            path = value
+        elif name in ('--scanner', '--parser', '--engine') and value:
+            message[name[2:]] = value
+        elif arg == '--optimize':
+            message["optimize"] = True
+        elif arg == '--print-ast':
+            message["print_ast"] = True
+        elif arg == '-' or not arg.startswith('--'):
+            scripts.append(arg)
+        else:
+            scripts = []
+            break
+    if len(scripts) != 1:
+        print("Usage: client.py [--socket=PATH] [--scanner=NAME] [--parser=NAME] [--engine=NAME] [--optimize] "
+              "[--print-ast] script | -", file=sys.stderr)
+        return 64
+
+    if scripts[0] == '-':
+        message["source"] = sys.stdin.read()
+    else:
+        # the server may run in another directory
+        message["file"] = os.path.abspath(scripts[0])
+
+    try:
+        response = request(message, path)
+    except OSError as error:
+        print(f"Can't reach the lox server at {path}: {error.strerror or error}", file=sys.stderr)
+        return UNAVAILABLE
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["status"]
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
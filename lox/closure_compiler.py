@@ -0,0 +1,229 @@
+from . import Expr
+from .token_type import TokenType
+from .runtime_error import LoxRuntimeError
+from .interpreter import Interpreter
+from .rope import Rope, STRING_TYPES, concat
+
+
+class ClosureCompiler(Expr.ExprVisitor):
+    """
+    Turns an expression tree into a tree of plain python closures, once.
+    Every visit method returns a zero argument function that evaluates its node. The operator of a node is
+    looked at while compiling, so the returned closure is already specialised to it: calling it runs no
+    visitor dispatch, no match on the operator type and no enum comparisons.
+    The closures behave exactly like Interpreter.evaluate, including the LoxRuntimeError raised for bad operands.
+    Variables are read and written through interpreter, which holds them.
+    """
+
+    def __init__(self, interpreter: Interpreter | None = None):
+        self.interpreter = interpreter or Interpreter()
+
+    def compile(self, expr: Expr.Expr):
+        return expr.accept(self)
+
+    def visit_literal_expr(self, expr: 'Expr.Literal'):
+        value = expr.value
+
+        def literal():
+            return value
+        return literal
+
+    def visit_grouping_expr(self, expr: 'Expr.Grouping'):
+        # a grouping only matters for parsing, evaluating it is evaluating the inner expression
+        return expr.expression.accept(self)
+
+    def visit_arena_expr(self, expr: 'arena.Arena'):
+        # one closure per node would call into its children as deep as the tree is, an arena is already laid out
+        # for a single loop with a value stack, so its closure runs the interpreter's loop over the arrays
+        evaluate = self.interpreter.visit_arena_expr
+
+        def walk():
+            return evaluate(expr)
+        return walk
+
+    def visit_unary_expr(self, expr: 'Expr.Unary'):
+        right = expr.right.accept(self)
+        operator = expr.operator
+
+        match operator.type:
+            case TokenType.MINUS:
+                def negate():
+                    value = right()
+                    if type(value) == float: return -value
+                    raise LoxRuntimeError(operator, "Operand must be a number.")
+                return negate
+            case TokenType.BANG:
+                def bang():
+                    value = right()
+                    # false and nil are the only falsey values
+                    return value is None or value is False
+                return bang
+
+        def unknown():
+            right()
+            return None
+        return unknown
+
+    def visit_binary_expr(self, expr: 'Expr.Binary'):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        operator = expr.operator
+
+        match operator.type:
+            case TokenType.MINUS:
+                def subtract():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a - b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return subtract
+            case TokenType.SLASH:
+                def divide():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float:
+                        if b: return a / b
+                        raise LoxRuntimeError(operator, "Division by zero.")
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return divide
+            case TokenType.STAR:
+                def multiply():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a * b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return multiply
+            case TokenType.PLUS:
+                def add():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float:
+                        return a + b
+                    if type(a) in STRING_TYPES and type(b) in STRING_TYPES:
+                        return concat(a, b)
+                    raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
+                return add
+            case TokenType.GREATER:
+                def greater():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a > b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a >= b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return greater_equal
+            case TokenType.LESS:
+                def less():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a < b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return less
+            case TokenType.LESS_EQUAL:
+                def less_equal():
+                    a = left()
+                    b = right()
+                    if type(a) == float and type(b) == float: return a <= b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+                return less_equal
+            case TokenType.BANG_EQUAL:
+                def not_equal():
+                    a = left()
+                    b = right()
+                    return not (a is b or (type(a) == type(b) or type(a) is Rope or type(b) is Rope) and a == b)
+                return not_equal
+            case TokenType.EQUAL_EQUAL:
+                def equal():
+                    a = left()
+                    b = right()
+                    return a is b or (type(a) == type(b) or type(a) is Rope or type(b) is Rope) and a == b
+                return equal
+
+        def unknown():
+            left()
+            right()
+            return None
+        return unknown
+
+    def visit_variable_expr(self, expr: 'Expr.Variable'):
+        look_up = self.interpreter.look_up
+
+        def variable():
+            return look_up(expr)
+        return variable
+
+    def visit_assign_expr(self, expr: 'Expr.Assign'):
+        value = expr.value.accept(self)
+        assign = self.interpreter.assign
+
+        def assignment():
+            return assign(expr, value())
+        return assignment
+
+    def visit_logical_expr(self, expr: 'Expr.Logical'):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+
+        if expr.operator.type == TokenType.OR:
+            def logical_or():
+                value = left()
+                if not (value is None or value is False): return value
+                return right()
+            return logical_or
+
+        def logical_and():
+            value = left()
+            if value is None or value is False: return value
+            return right()
+        return logical_and
+
+    def visit_call_expr(self, expr: 'Expr.Call'):
+        callee = expr.callee.accept(self)
+        arguments = [argument.accept(self) for argument in expr.arguments]
+        call = self.interpreter.call
+        paren = expr.paren
+
+        def call_expr():
+            function = callee()
+            return call(function, paren, [argument() for argument in arguments])
+        return call_expr
+
+
+class ClosureInterpreter(Interpreter):
+    """
+    Execution mode that compiles the expression with ClosureCompiler and then calls the result.
+    Statements are run by Interpreter, the expressions in them are compiled and called. While a program runs
+    every expression is compiled only once, loops and function bodies call the cached closure again.
+    Use compile() directly to evaluate the same AST many times while paying for the compilation once.
+    """
+
+    def __init__(self, reporter=None):
+        super().__init__(reporter)
+        self.compiler = ClosureCompiler(self)
+        # node -> its closure while a program runs, None otherwise
+        self.compiled = None
+
+    def compile(self, expr: Expr.Expr):
+        return self.compiler.compile(expr)
+
+    def evaluate(self, expr: Expr.Expr):
+        compiled = self.compiled
+        if compiled is None:
+            return self.compiler.compile(expr)()
+        function = compiled.get(expr)
+        if function is None:
+            function = compiled[expr] = self.compiler.compile(expr)
+        return function()
+
+    def execute_program(self, statements):
+        # the cache lives as long as the program, so it never outgrows the tree being run
+        self.compiled = {}
+        try:
+            super().execute_program(statements)
+        finally:
+            self.compiled = None
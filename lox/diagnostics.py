@@ -0,0 +1,116 @@
+"""
+Checks sources for errors without running them.
+check(source) scans, parses and resolves a source once and returns every scanner, syntax and resolver error as
+a Diagnostic with its position, instead of printing them like a run does. The parser skips to the next
+statement after a syntax error, so one pass finds all of them.
+
+    python lox/main.py --check script.lox
+    python lox/main.py --many --check -j 8 scripts/
+"""
+from bisect import bisect_right
+from .errors import ErrorReporter
+from .parser import Parser
+from .scanner import Scanner
+from .token_type import TokenType
+
+
+class Diagnostic:
+    """
+    One error found in a source. kind is "scan", "syntax" or "resolve"; line and column (both from 1) are where
+    the character or token the error is about starts, offset is the same position as an index into the source.
+    where is the " at 'token'" part of the message Lox prints.
+    """
+    __slots__ = ('kind', 'line', 'column', 'offset', 'where', 'message')
+
+    def __init__(self, kind: str, line: int, column: int, offset: int, where: str, message: str):
+        self.kind = kind
+        self.line = line
+        self.column = column
+        self.offset = offset
+        self.where = where
+        self.message = message
+
+    def __str__(self):
+        return f"{self.line}:{self.column}: Error{self.where}: {self.message}"
+
+    def __repr__(self):
+        return f"Diagnostic({self.kind!r}, {self.line}, {self.column}, {self.where!r}, {self.message!r})"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PositionScanner(Scanner):
+    """Scanner that also records the offset of every token it adds, in offsets next to tokens."""
+
+    def reset(self, source: str):
+        super().reset(source)
+        self.offsets: list[int] = []
+
+    def add_token(self, type: TokenType, literal: object = None) -> None:
+        self.offsets.append(self.start)
+        super().add_token(type, literal)
+
+
+class Diagnostics(ErrorReporter):
+    """
+    Reporter that collects the errors of one source as Diagnostics instead of printing them.
+    kind is set to the phase whose errors are being reported. Positions of tokens are looked up in the
+    scanner's offsets, the lookup table is only built once a parse or resolve error comes in.
+    """
+
+    def __init__(self, source: str):
+        super().__init__()
+        self.source = source
+        self.kind = "scan"
+        self.diagnostics: list[Diagnostic] = []
+        self.scanner: PositionScanner | None = None
+        self.positions: dict[int, int] | None = None
+        self.line_starts: list[int] | None = None
+
+    def scanner_error(self, line: int, message: str, offset: int | None = None):
+        self.add(offset, "", message)
+
+    def error(self, token, message: str):
+        if self.positions is None:
+            # id of a token -> its offset, the EOF token is at the end of the source
+            scanner = self.scanner
+            self.positions = dict(zip(map(id, scanner.tokens), scanner.offsets))
+        offset = self.positions.get(id(token), len(self.source))
+        self.add(offset, self.where(token), message)
+
+    def add(self, offset: int, where: str, message: str):
+        if self.line_starts is None:
+            source = self.source
+            starts = [0]
+            position = source.find("\n")
+            while position != -1:
+                starts.append(position + 1)
+                position = source.find("\n", position + 1)
+            self.line_starts = starts
+        line = bisect_right(self.line_starts, offset)
+        column = offset - self.line_starts[line - 1] + 1
+        self.diagnostics.append(Diagnostic(self.kind, line, column, offset, where, message))
+        self.had_error = True
+        self.error_count += 1
+
+
+def check(source: str) -> list[Diagnostic]:
+    # every error of the source in the order a run would report them: scanner errors, then syntax errors, then
+    # resolver errors when there were none of those, like a run
+    reporter = Diagnostics(source)
+    scanner = reporter.scanner = PositionScanner(source, reporter)
+    scanner.scan_tokens()
+    reporter.kind = "syntax"
+    parser = Parser(scanner.tokens, reporter)
+    tree = parser.parse()
+    if not reporter.had_error and parser.names:
+        from .resolver import Resolver
+        reporter.kind = "resolve"
+        Resolver(reporter).resolve(tree)
+    return reporter.diagnostics
+
+
+def check_file(path: str) -> list[Diagnostic]:
+    with open(path) as file:
+        return check(file.read())
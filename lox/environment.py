@@ -0,0 +1,23 @@
+"""
+Where variables live at run time. The resolver gives every variable a (depth, slot) pair before a program runs,
+so the interpreter never looks a local variable up by name:
+ - depth -1 is a global, kept by name in the globals dict of the interpreter (one per session), slot is unused.
+   Nothing about globals is numbered in the tree, so resolved trees can be cached and run by any session.
+ - depth d >= 0 is a local of the block d levels out from the innermost one. The environment of a block is a
+   list sized by the resolver: item 0 is the enclosing environment (None outside of any block), the locals of
+   the block are the items from 1.
+"""
+
+
+class Undefined:
+    """
+    Type of the UNDEFINED sentinel, what looking up a global that wasn't declared (yet) gives.
+    nil is a valid value of a variable, so it can't be used for that.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return "undefined"
+
+
+UNDEFINED = Undefined()
@@ -0,0 +1,73 @@
+import sys
+from io import TextIOBase
+from .tokens import Token
+from .token_type import TokenType
+from .runtime_error import LoxRuntimeError
+
+
+class ErrorReporter:
+    """
+    Where the scanner, parser and interpreter send their errors and output.
+    Each run gets its own reporter, so the had_error/had_runtime_error flags of one run can't leak into another
+    one running at the same time.
+    stdout/stderr default to sys.stdout/sys.stderr at the time of writing. When sink is a list, syntax errors
+    are appended to it as (line, where, message) instead of being printed.
+    Scanners pass the offset of the character a scanner error is about, this reporter doesn't use it.
+    """
+
+    def __init__(self, stdout: TextIOBase | None = None, stderr: TextIOBase | None = None,
+                 sink: list[tuple[int, str, str]] | None = None):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.sink = sink
+        self.had_error = False
+        self.had_runtime_error = False
+        # unlike the flags these are never reset, they count every error reported to this reporter
+        self.error_count = 0
+        self.runtime_error_count = 0
+
+    def reset(self):
+        self.had_error = False
+        self.had_runtime_error = False
+
+    def exit_status(self) -> int:
+        # process exit code for the sources run so far: 65 for syntax errors, 70 for runtime errors
+        if self.had_error:
+            return 65
+        elif self.had_runtime_error:
+            return 70
+        else:
+            return 0
+
+    def print(self, text: str):
+        print(text, file=self.stdout or sys.stdout)
+
+    def scanner_error(self, line: int, message: str, offset: int | None = None):
+        self.report(line, "", message)
+
+    def error(self, token: Token, message: str):
+        self.report(token.line, self.where(token), message)
+
+    @staticmethod
+    def where(token: Token) -> str:
+        # the part of an error message saying which token it is about
+        if token.type == TokenType.EOF:
+            return ' at end'
+        return f" at '{token.lexeme}'"
+
+    def runtime_error(self, error: LoxRuntimeError):
+        # errors without a token (a stack overflow of a whole tree) have no line to give
+        if error.token is None:
+            print(error, file=self.stderr or sys.stderr)
+        else:
+            print(f"{error}\n[line {error.token.line}]", file=self.stderr or sys.stderr)
+        self.had_runtime_error = True
+        self.runtime_error_count += 1
+
+    def report(self, line: int, where: str, message: str) -> None:
+        if self.sink is not None:
+            self.sink.append((line, where, message))
+        else:
+            print(f"[line {line}] Error{where}: {message}", file=self.stderr or sys.stderr)
+        self.had_error = True
+        self.error_count += 1
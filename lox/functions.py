@@ -0,0 +1,72 @@
+"""
+Values lox code can call.
+A call runs the body of a function in a frame, the environment of the call laid out like the one of a block
+(see environment.py): item 0 is the environment the function was declared in, its parameters are the items
+from 1 followed by the locals of its body. A frame only outlives its call when a function declared inside it
+captured it, so the frames of functions that declare no other function (the resolver sets pooled on them) are
+kept in a pool once the call returns and handed to the next call instead of allocating a new one.
+"""
+import time
+from abc import ABC, abstractmethod
+from . import Stmt
+
+
+class LoxCallable(ABC):
+    """A value that can be called: arity is the number of arguments it takes."""
+    __slots__ = ()
+    arity: int
+
+    @abstractmethod
+    def call(self, interpreter, arguments: list):
+        pass
+
+
+class LoxFunction(LoxCallable):
+    """A function declared in lox code, closed over the environment it was declared in."""
+    __slots__ = ('declaration', 'closure', 'arity', 'pool')
+
+    def __init__(self, declaration: Stmt.Function, closure):
+        self.declaration = declaration
+        self.closure = closure
+        self.arity = len(declaration.params)
+        # frames of finished calls, ready for the next one; None when a frame can be captured
+        # every frame of a function has the same closure, pooled frames keep it in item 0
+        self.pool = [] if declaration.pooled else None
+
+    def call(self, interpreter, arguments: list):
+        return interpreter.call_function(self, arguments)
+
+    def new_frame(self) -> list:
+        frame = [None] * (self.declaration.size + 1)
+        frame[0] = self.closure
+        return frame
+
+    def __str__(self):
+        return f"<fn {self.declaration.name.lexeme}>"
+
+
+class NativeFunction(LoxCallable):
+    """A function implemented in python, called with the argument values as positional arguments."""
+    __slots__ = ('name', 'arity', 'function')
+
+    def __init__(self, name: str, arity: int, function):
+        self.name = name
+        self.arity = arity
+        self.function = function
+
+    def call(self, interpreter, arguments: list):
+        return self.function(*arguments)
+
+    def __str__(self):
+        return "<native fn>"
+
+
+def clock() -> float:
+    # seconds as a lox number, only differences between two calls are meaningful
+    return time.time()
+
+
+# functions every interpreter defines as globals
+NATIVES = (
+    NativeFunction("clock", 0, clock),
+)
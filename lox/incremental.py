@@ -0,0 +1,265 @@
+"""
+Incremental scanning and parsing of a source that is edited over time, e.g. an editor buffer.
+A Document splits its source into segments, one per top level declaration: the span of a segment runs from
+its first token to the first token of the next one, so whitespace and comments belong to the segment before
+them. Each segment keeps its tokens, the offsets of those tokens and its resolved statement.
+
+An edit (offset, removed length, inserted text) rescans from the start of the segment holding the character
+before the edit and stops as soon as a token starts exactly where the first token of a segment after the edit
+now starts: scanning from a token boundary only depends on the text from there, so all the following tokens
+are the same as before. Only the rescanned segments are parsed and resolved again, the statements of the
+others are reused. When the rescanned declarations run into the end of that region (an unclosed block, a
+missing ";") the region takes in the following segments until they parse on their own.
+
+Segments after the edit move by the size of the edit. Their starts and lines are kept in two lists of the
+document, next to the segments, and shifted there; the tokens of a segment only get their new lines when the
+tokens or the program are asked for. An edit costs time in proportion to the rescanned segments, plus shifting
+two lists of ints as long as the number of top level declarations, not in proportion to the number of tokens.
+"""
+from bisect import bisect_left, bisect_right
+from . import Stmt
+from .tokens import Token, NO_LITERAL
+from .token_type import TokenType
+from .errors import ErrorReporter
+from .parser import Parser, ParseError
+from .regex_scanner import scan_with_offsets
+from .resolver import Resolver
+
+
+def start_line(token: Token) -> int:
+    # line the token starts on, strings carry the line they end on
+    if token.type == TokenType.STRING:
+        return token.line - token.lexeme.count("\n")
+    return token.line
+
+
+class RegionParser(Parser):
+    """Parser for the tokens of a region of a document, one top level declaration after the other."""
+
+    def parse_region(self) -> tuple[list[tuple[int, Stmt.Stmt | None, int]], bool]:
+        # (index of the token after it, statement or None when it has a syntax error, errors reported so far)
+        # for every declaration, and whether the last one needs tokens from after the region
+        declarations = []
+        open_end = False
+        sink = self.reporter.sink
+        while not self.is_at_end():
+            self.reached_end = False
+            reported = len(sink)
+            statement = self.declaration()
+            if len(sink) > reported:
+                # declaration() skipped past its syntax errors, possibly ones in a nested block
+                statement = None
+            open_end = self.reached_end
+            declarations.append((self.current, statement, len(sink)))
+        return declarations, open_end
+
+    def error(self, token, message) -> ParseError:
+        if token.type == TokenType.EOF:
+            self.reached_end = True
+        return super().error(token, message)
+
+    def synchronize(self):
+        super().synchronize()
+        # the whole source would be skipped up to the next ";" or statement keyword
+        if self.is_at_end() and self.previous().type != TokenType.SEMICOLON:
+            self.reached_end = True
+
+
+class Segment:
+    """
+    One top level declaration of a Document: its tokens with their offsets from the start of its span, its
+    resolved statement (None when it has a syntax error) and its errors.
+    Its start and line live in the document, line here is the one its tokens and errors were numbered for.
+    """
+    __slots__ = ('line', 'offsets', 'tokens', 'statement', 'scan_errors', 'errors')
+
+    def __init__(self, line: int):
+        self.line = line
+        self.offsets: list[int] = []
+        self.tokens: list[Token] = []
+        self.statement = None
+        # (offset from start, line, message) of the scanner errors in the span
+        self.scan_errors: list[tuple[int, int, str]] = []
+        # (line, where, message) of the parser and resolver errors, like an ErrorReporter sink
+        self.errors: list[tuple[int, str, str]] = []
+
+    def settle(self, line: int):
+        # renumbers tokens and errors for a span that now starts on line
+        shift = line - self.line
+        if not shift: return
+        for token in self.tokens:
+            token.line += shift
+        self.scan_errors = [(offset, error_line + shift, message) for offset, error_line, message in self.scan_errors]
+        self.errors = [(error_line + shift, where, message) for error_line, where, message in self.errors]
+        self.line = line
+
+
+class Document:
+    """
+    A source kept scanned, parsed and resolved across edits, see the module docstring.
+    It gives the tokens, program and errors a full scan with RegexScanner and parse with Parser would, except
+    that the source is always parsed as a program, a lone expression without ";" is an error here, and the
+    program keeps the declarations without syntax errors.
+    The tokens and statements handed out are shared with the document, later edits update their lines.
+    """
+
+    def __init__(self, source: str = ""):
+        self.source = source
+        self.segments: list[Segment] = []
+        # offset and line where the span of every segment starts
+        self.starts: list[int] = []
+        self.lines: list[int] = []
+        self.eof_line = source.count("\n") + 1
+        self.rescan(0, 0)
+
+    def edit(self, offset: int, removed: int, inserted: str) -> int:
+        """
+        Replaces removed characters at offset with inserted and brings tokens and program up to date.
+        Returns the number of tokens that were scanned again.
+        """
+        source = self.source
+        end = offset + removed
+        if not 0 <= offset <= end <= len(source):
+            raise ValueError(f"edit of {removed} characters at {offset} is outside of the source")
+        delta = len(inserted) - removed
+        lines = inserted.count("\n") - source.count("\n", offset, end)
+        self.source = source[:offset] + inserted + source[end:]
+        self.eof_line += lines
+
+        starts = self.starts
+        # a token ending right before the edit can grow, so the segment holding that character is rescanned
+        first = max(bisect_right(starts, offset - 1) - 1, 0)
+        # a declaration with a syntax error ends where skipping to the next statement stopped, at the first token
+        # of the next segment, and skips further when that token changes
+        if first > 0 and self.segments[first - 1].statement is None:
+            first -= 1
+        # the segments starting from the end of the edit on keep their tokens and move, the first token of one
+        # starting right at the end can merge with the inserted text, it then no longer lines up
+        after = max(bisect_left(starts, end), first + 1)
+        if delta:
+            starts[after:] = [start + delta for start in starts[after:]]
+        if lines:
+            self.lines[after:] = [line + lines for line in self.lines[after:]]
+        return self.rescan(first, after)
+
+    def rescan(self, first: int, after: int) -> int:
+        # scans from segment first until a token lines up with the first token of one of the segments from after
+        # on, then parses the rescanned region into the segments replacing first up to that one
+        segments, starts, lines = self.segments, self.starts, self.lines
+        count = len(segments)
+        position = starts[first] if segments else 0
+        line = lines[first] if segments else 1
+        region: list[tuple[int, Token]] = []
+        scan_errors: list[tuple[int, int, str]] = []
+        reuse = after
+        for offset, token in scan_with_offsets(self.source, position, line, scan_errors):
+            # segments the new tokens ran past can't line up anymore, a segment without tokens never can
+            while reuse < count and (not segments[reuse].tokens or starts[reuse] < offset):
+                reuse += 1
+            if reuse < count and starts[reuse] == offset:
+                break
+            region.append((offset, token))
+        else:
+            reuse = count
+        scanned = len(region)
+        if first > 0 and region and region[0][1].type == TokenType.ELSE:
+            # an else starting the region belongs to an if ending the segment before, that one is parsed again
+            first -= 1
+            segment = segments[first]
+            segment.settle(lines[first])
+            position, line = starts[first], lines[first]
+            region[:0] = [(position + relative, token) for relative, token in zip(segment.offsets, segment.tokens)]
+            scan_errors[:0] = [(position + relative, error_line, message)
+                               for relative, error_line, message in segment.scan_errors]
+
+        grow = 1
+        while True:
+            eof = Token(TokenType.EOF, "", NO_LITERAL, lines[reuse] if reuse < count else self.eof_line)
+            errors: list[tuple[int, str, str]] = []
+            parser = RegionParser([token for _, token in region] + [eof], ErrorReporter(sink=errors))
+            declarations, open_end = parser.parse_region()
+            # a trailing if takes an else from the next segment
+            if reuse < count and (open_end or segments[reuse].tokens[0].type == TokenType.ELSE):
+                # the region takes in more segments each time, so a block left open doesn't get quadratic
+                for index in range(reuse, min(reuse + grow, count)):
+                    segment = segments[index]
+                    segment.settle(lines[index])
+                    start = starts[index]
+                    region.extend((start + relative, token) for relative, token in zip(segment.offsets, segment.tokens))
+                    scan_errors.extend((start + relative, error_line, message)
+                                       for relative, error_line, message in segment.scan_errors)
+                reuse = min(reuse + grow, count)
+                grow *= 2
+                continue
+            break
+
+        new, new_starts = self.build(position, line, region, declarations, errors, scan_errors)
+        if not new and first > 0:
+            # nothing but whitespace and comments left, they join the segment before
+            previous = segments[first - 1]
+            previous.settle(lines[first - 1])
+            previous.scan_errors.extend((offset - starts[first - 1], error_line, message)
+                                        for offset, error_line, message in scan_errors)
+        elif not new:
+            # an empty source still has one (empty) segment
+            new, new_starts = [Segment(1)], [0]
+            new[0].scan_errors = scan_errors
+        segments[first:reuse] = new
+        starts[first:reuse] = new_starts
+        lines[first:reuse] = [segment.line for segment in new]
+        return scanned
+
+    @staticmethod
+    def build(position, line, region, declarations, errors, scan_errors) -> tuple[list[Segment], list[int]]:
+        # one segment per parsed declaration and where it starts, the first one starts where the region does
+        new = []
+        new_starts = []
+        begin = 0
+        reported = 0
+        for end, statement, error_count in declarations:
+            if new:
+                position, token = region[begin]
+                line = start_line(token)
+            segment = Segment(line)
+            segment.offsets = [offset - position for offset, _ in region[begin:end]]
+            segment.tokens = [token for _, token in region[begin:end]]
+            segment.errors = errors[reported:error_count]
+            if statement is not None:
+                resolver_errors = []
+                Resolver(ErrorReporter(sink=resolver_errors)).resolve([statement])
+                segment.errors.extend(resolver_errors)
+            segment.statement = statement
+            new.append(segment)
+            new_starts.append(position)
+            begin, reported = end, error_count
+
+        for offset, error_line, message in scan_errors:
+            index = max(bisect_right(new_starts, offset) - 1, 0)
+            if new:
+                new[index].scan_errors.append((offset - new_starts[index], error_line, message))
+        return new, new_starts
+
+    def settled(self) -> list[Segment]:
+        # the segments, with their tokens and errors numbered for the current source
+        segments, lines = self.segments, self.lines
+        for index, segment in enumerate(segments):
+            segment.settle(lines[index])
+        return segments
+
+    def tokens(self) -> list[Token]:
+        # every token of the source, ending with EOF, like Scanner.tokens
+        tokens = []
+        for segment in self.settled():
+            tokens.extend(segment.tokens)
+        tokens.append(Token(TokenType.EOF, "", NO_LITERAL, self.eof_line))
+        return tokens
+
+    def program(self) -> list[Stmt.Stmt]:
+        # the resolved statements of the declarations without syntax errors
+        return [segment.statement for segment in self.settled() if segment.statement is not None]
+
+    def errors(self) -> list[tuple[int, str, str]]:
+        # (line, where, message) of every error, the scanner errors first, like an ErrorReporter sink
+        segments = self.settled()
+        return ([(line, "", message) for segment in segments for _, line, message in segment.scan_errors]
+                + [error for segment in segments for error in segment.errors])
@@ -1,39 +1,52 @@
-import Expr
-from token_type import TokenType
-from runtime_error import LoxRuntimeError
+from . import Expr, Stmt
+from .token_type import TokenType
+from .runtime_error import LoxRuntimeError
+from .errors import ErrorReporter
+from .environment import UNDEFINED
+from .functions import LoxCallable, LoxFunction, NATIVES
+from .rope import Rope, STRING_TYPES, concat
 
 
 
-class Interpreter(Expr.ExprVisitor):
-    pass
+class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
+    """
+    Tree walking interpreter. Variables are read and written at the (depth, slot) the resolver stored on their
+    nodes, see environment.py for the layout, so trees have to be resolved before they are run.
+    return doesn't raise: executing a statement returns True when a return statement ran, the value is left in
+    return_value and every enclosing statement hands the True up until the call that ran the function body.
+    """
+
+    def __init__(self, reporter: ErrorReporter | None = None):
+        # output and runtime errors go to the reporter of the run this interpreter belongs to
+        self.reporter = reporter or ErrorReporter()
+        # values of the global variables by name, kept from one run to the next like in the REPL
+        self.globals: dict[str, object] = {}
+        # environment of the innermost block or call being executed, None outside of them
+        self.environment = None
+        # value of the return statement that is unwinding to its call
+        self.return_value = None
+        for native in NATIVES:
+            self.define_global(native.name, native)
 
     def evaluate(self, expr: Expr.Expr):
         return expr.accept(self)
 
     def is_truthy(self, value):
-        # Handle string representations of 'true' and 'false'
         # false and nil are false, other everything is True
-        if isinstance(value, str):
-            if value == "false":
-                return False
-            elif value == "nil":
-                return False
+        # lox booleans are python's True/False singletons and nil is None, so identity checks are enough
+        return not (value is None or value is False)
 
-        # Everything else is considered truthy
-        return True
     def is_equal(self, a,b):
         # checks if the pass arguments are equal
-        return a == b
-
-    def boolean_string(self, value):
-        # convert boolean to string as required by lox
-        if value == False:
-            return "false"
-        return "true"
+        # values of different types are never equal, python on its own would say 1 == true
+        # a rope is equal to the str with its text
+        return a is b or (type(a) == type(b) or type(a) is Rope or type(b) is Rope) and a == b
 
     def stringify(self, object):
         # converts string to value
         if object is None: return "nil"
+        if object is True: return "true"
+        if object is False: return "false"
         if type(object) == float:
             text = str(object)
             if text.endswith(".0"):
@@ -44,7 +57,6 @@ class Interpreter(Expr.ExprVisitor):
 
 
     def check_number_operand(self, operator, operand):
-        from lox import Lox
         # check the type of operand
         if (type(operand) == float): return
         raise LoxRuntimeError(operator, "Operand must be a number.")
@@ -60,69 +72,257 @@ class Interpreter(Expr.ExprVisitor):
         return self.evaluate(expr.expression)
 
     def visit_unary_expr(self, expr: 'Expr.Unary'):
+        return self.unary(expr.operator, self.evaluate(expr.right))
+
+    def visit_arena_expr(self, expr: 'arena.Arena'):
+        # the nodes are in post order, so one pass with a value stack evaluates the whole tree
+        from . import arena
+        values = []
+        literals, operators, left = expr.literals, expr.operators, expr.left
+        node = 0
+        try:
+            for node, kind in enumerate(expr.kinds):
+                if kind == arena.LITERAL:
+                    values.append(literals[left[node]])
+                elif kind == arena.BINARY:
+                    right = values.pop()
+                    values.append(self.binary(arena.OPERATOR_TOKENS[operators[node]], values.pop(), right))
+                elif kind == arena.UNARY:
+                    values.append(self.unary(arena.OPERATOR_TOKENS[operators[node]], values.pop()))
+                # a grouping's value is the value of its expression, already on the stack
+        except LoxRuntimeError as error:
+            # the shared operator tokens carry no line, report the one of the failing node
+            raise LoxRuntimeError(expr.token(node), str(error)) from None
+        return values.pop()
+
+    def visit_binary_expr(self, expr: 'Expr.Binary'):
+        left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
-        match expr.operator.type:
+        return self.binary(expr.operator, left, right)
+
+    def visit_variable_expr(self, expr: 'Expr.Variable'):
+        return self.look_up(expr)
+
+    def visit_assign_expr(self, expr: 'Expr.Assign'):
+        return self.assign(expr, self.evaluate(expr.value))
+
+    def visit_logical_expr(self, expr: 'Expr.Logical'):
+        # the value of the operand that decided the result, not a boolean
+        left = self.evaluate(expr.left)
+        if expr.operator.type == TokenType.OR:
+            if not (left is None or left is False): return left
+        elif left is None or left is False:
+            return left
+        return self.evaluate(expr.right)
+
+    def visit_call_expr(self, expr: 'Expr.Call'):
+        callee = self.evaluate(expr.callee)
+        evaluate = self.evaluate
+        return self.call(callee, expr.paren, [evaluate(argument) for argument in expr.arguments])
+
+    def call(self, callee, paren, arguments: list):
+        # calls an evaluated callee with evaluated arguments, paren locates the errors
+        # lox functions skip the isinstance check, it is slow on an abstract base class
+        if type(callee) is not LoxFunction and not isinstance(callee, LoxCallable):
+            raise LoxRuntimeError(paren, "Can only call functions and classes.")
+        if len(arguments) != callee.arity:
+            raise LoxRuntimeError(paren, f"Expected {callee.arity} arguments but got {len(arguments)}.")
+        try:
+            return callee.call(self, arguments)
+        except RecursionError:
+            raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+    def call_function(self, function: LoxFunction, arguments: list):
+        # runs the body of a lox function in a frame from its pool, or a new one when the pool is empty
+        # the slots of a reused frame still hold the values of an earlier call, but a local is always
+        # declared, and so written, before it can be read
+        pool = function.pool
+        frame = pool.pop() if pool else function.new_frame()
+        frame[1:len(arguments) + 1] = arguments
+        previous = self.environment
+        self.environment = frame
+        try:
+            for statement in function.declaration.body:
+                if statement.accept(self):
+                    value = self.return_value
+                    self.return_value = None
+                    return value
+            return None
+        finally:
+            self.environment = previous
+            if pool is not None:
+                pool.append(frame)
+
+    def look_up(self, expr: 'Expr.Variable'):
+        # value of a resolved variable
+        slot = expr.slot
+        depth = expr.depth
+        if depth < 0:
+            value = self.globals.get(expr.name.lexeme, UNDEFINED)
+            if value is not UNDEFINED: return value
+            raise LoxRuntimeError(expr.name, f"Undefined variable '{expr.name.lexeme}'.")
+        environment = self.environment
+        while depth:
+            environment = environment[0]
+            depth -= 1
+        return environment[slot]
+
+    def assign(self, expr: 'Expr.Assign', value):
+        # stores value in an existing variable and returns it, assignment is an expression
+        slot = expr.slot
+        depth = expr.depth
+        if depth < 0:
+            values = self.globals
+            name = expr.name.lexeme
+            if name not in values:
+                raise LoxRuntimeError(expr.name, f"Undefined variable '{name}'.")
+            values[name] = value
+            return value
+        environment = self.environment
+        while depth:
+            environment = environment[0]
+            depth -= 1
+        environment[slot] = value
+        return value
+
+    def define(self, stmt: 'Stmt.Var | Stmt.Function', value):
+        # locals are always declared in the innermost environment, globals by name
+        if stmt.depth < 0:
+            self.define_global(stmt.name.lexeme, value)
+        else:
+            self.environment[stmt.slot] = value
+
+    def define_global(self, name: str, value):
+        self.globals[name] = value
+
+    def execute(self, stmt: Stmt.Stmt):
+        # True when a return statement ran
+        return stmt.accept(self)
+
+    def execute_program(self, statements: list[Stmt.Stmt]):
+        # the resolver rejects return outside of functions, there is nothing to hand up
+        for statement in statements:
+            statement.accept(self)
+
+    def execute_statements(self, statements: list[Stmt.Stmt]):
+        for statement in statements:
+            if statement.accept(self): return True
+        return None
+
+    def execute_block(self, statements: list[Stmt.Stmt], environment: list):
+        previous = self.environment
+        self.environment = environment
+        try:
+            for statement in statements:
+                if statement.accept(self): return True
+            return None
+        finally:
+            self.environment = previous
+
+    def visit_block_stmt(self, stmt: 'Stmt.Block'):
+        # a block that declares nothing runs in the enclosing environment
+        if not stmt.size:
+            return self.execute_statements(stmt.statements)
+        # item 0 is the enclosing environment, the resolver counted the locals of the block
+        environment = [None] * (stmt.size + 1)
+        environment[0] = self.environment
+        return self.execute_block(stmt.statements, environment)
+
+    def visit_expression_stmt(self, stmt: 'Stmt.Expression'):
+        self.evaluate(stmt.expression)
+
+    def visit_function_stmt(self, stmt: 'Stmt.Function'):
+        self.define(stmt, LoxFunction(stmt, self.environment))
+
+    def visit_if_stmt(self, stmt: 'Stmt.If'):
+        value = self.evaluate(stmt.condition)
+        if not (value is None or value is False):
+            return stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            return stmt.else_branch.accept(self)
+        return None
+
+    def visit_print_stmt(self, stmt: 'Stmt.Print'):
+        self.reporter.print(self.stringify(self.evaluate(stmt.expression)))
+
+    def visit_return_stmt(self, stmt: 'Stmt.Return'):
+        self.return_value = None if stmt.value is None else self.evaluate(stmt.value)
+        return True
+
+    def visit_var_stmt(self, stmt: 'Stmt.Var'):
+        value = None
+        if stmt.initializer is not None:
+            value = self.evaluate(stmt.initializer)
+        self.define(stmt, value)
+
+    def visit_while_stmt(self, stmt: 'Stmt.While'):
+        condition, body, evaluate = stmt.condition, stmt.body, self.evaluate
+        while True:
+            value = evaluate(condition)
+            if value is None or value is False: return None
+            if body.accept(self): return True
+
+    def unary(self, operator, right):
+        # applies a unary operator to its already evaluated operand
+        match operator.type:
             case TokenType.MINUS:
-                self.check_number_operand(expr.operator, right)
+                self.check_number_operand(operator, right)
                 return -float(right)
             case TokenType.BANG:
-                if self.is_truthy(right):
-                    return "false"
-                return "true"
-                # return not self.is_truthy(right)
+                return not self.is_truthy(right)
         # unreachable
         return None
 
-    def visit_binary_expr(self, expr: 'Expr.Binary'):
-        left = self.evaluate(expr.left)
-        right = self.evaluate(expr.right)
-
-        match expr.operator.type:
+    def binary(self, operator, left, right):
+        # applies a binary operator to its already evaluated operands
+        match operator.type:
             case TokenType.MINUS:
                 # checking object type
-                self.check_number_operands(expr.operator, left,right)
+                self.check_number_operands(operator, left,right)
                 return float(left) - float(right)
             case TokenType.SLASH:
-                self.check_number_operands(expr.operator, left, right)
+                self.check_number_operands(operator, left, right)
+                if right == 0:
+                    raise LoxRuntimeError(operator, "Division by zero.")
                 return float(left) / float(right)
             case TokenType.STAR:
-                self.check_number_operands(expr.operator, left, right)
+                self.check_number_operands(operator, left, right)
                 return float(left) * float(right)
             case TokenType.PLUS:
                 if type(left) == float and type(right) == float:
                     return float(left) + float(right)
-                # TODO: this needs to be fixed lated on, change "true" "false" to True False, supported by python
-                # currently "true" is considered as true(boolean) instead of string
-                elif left in ["true", "false"] or right in ["true", "false"]:
-                    raise LoxRuntimeError(expr.operator, "Operands must be two numbers or two strings.")
-                elif type(left) == str and type(right) == str:
-                    return str(left) + str(right)
-                raise LoxRuntimeError(expr.operator, "Operands must be two numbers or two strings.")
+                elif type(left) in STRING_TYPES and type(right) in STRING_TYPES:
+                    # long results are ropes, joined only when their text is needed
+                    return concat(left, right)
+                raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
             case TokenType.GREATER:
-                self.check_number_operands(expr.operator, left, right)
-                return self.boolean_string(float(left) > float(right))
+                self.check_number_operands(operator, left, right)
+                return float(left) > float(right)
             case TokenType.GREATER_EQUAL:
-                self.check_number_operands(expr.operator, left, right)
-                return self.boolean_string(float(left) >= float(right))
+                self.check_number_operands(operator, left, right)
+                return float(left) >= float(right)
             case TokenType.LESS:
-                self.check_number_operands(expr.operator, left, right)
-                return self.boolean_string(float(left) < float(right))
+                self.check_number_operands(operator, left, right)
+                return float(left) < float(right)
             case TokenType.LESS_EQUAL:
-                self.check_number_operands(expr.operator, left, right)
-                return self.boolean_string(float(left) <= float(right))
+                self.check_number_operands(operator, left, right)
+                return float(left) <= float(right)
             case TokenType.BANG_EQUAL:
-                return self.boolean_string(not self.is_equal(left, right))
+                return not self.is_equal(left, right)
             case TokenType.EQUAL_EQUAL:
-                return self.boolean_string(self.is_equal(left, right))
+                return self.is_equal(left, right)
             case _:
                 pass
         return None
 
-    def interpret(self, expr):
-        from lox import Lox
+    def interpret(self, tree):
+        # runs a program (list of statements), or evaluates a single expression and prints its value
         try:
-            value = self.evaluate(expr)
-            print(self.stringify(value))
-        except RuntimeError as error:
-            Lox.runtime_error(error)
+            if type(tree) is list:
+                self.execute_program(tree)
+            else:
+                value = self.evaluate(tree)
+                self.reporter.print(self.stringify(value))
+        except LoxRuntimeError as error:
+            self.reporter.runtime_error(error)
 
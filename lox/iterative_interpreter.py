@@ -0,0 +1,96 @@
+from . import Expr
+from .token_type import TokenType
+from .interpreter import Interpreter
+
+# first item of the work stack entries of nodes waiting for the values of their operands
+UNARY = 1
+BINARY = 2
+LOGICAL = 3
+ASSIGN = 4
+CALL = 5
+
+# node types evaluated by the loop itself, the others go through accept and their visit_* method
+INLINE = frozenset((Expr.Literal, Expr.Grouping, Expr.Binary, Expr.Unary, Expr.Logical, Expr.Assign, Expr.Call,
+                    Expr.Variable))
+
+
+class IterativeInterpreter(Interpreter):
+    """
+    Tree walking interpreter that evaluates with explicit stacks instead of python recursion,
+    so it can run trees of any depth the parser builds.
+    Nodes are evaluated in post order: an operator is applied once the values of its operands are on the
+    value stack, left operand first, so runtime errors are raised in the same order as Interpreter raises them.
+    "and"/"or" look at the value of their left operand before pushing the right one, so they still short-circuit.
+    Only calls recurse, into the statements of the function body.
+    Expressions aren't visited, so --stats can't count visit_* calls: the loop counts the nodes it evaluates into
+    visits instead, when it is set.
+    """
+    # node type name -> evaluations, set by stats.count_visits for the runs it instruments
+    visits = None
+
+    def evaluate(self, expr: Expr.Expr):
+        visits = self.visits
+        if visits is None:
+            # leaves (call arguments, conditions) are common and need no stacks
+            kind = type(expr)
+            if kind is Expr.Variable:
+                return self.look_up(expr)
+            if kind is Expr.Literal:
+                return expr.value
+        values = []
+        # nodes still to evaluate, and (kind, node) entries for nodes waiting for the values of their operands
+        work = [expr]
+
+        while work:
+            node = work.pop()
+            kind = type(node)
+            if visits is not None and kind in INLINE:
+                visits[kind.__name__] += 1
+            if kind is Expr.Variable:
+                values.append(self.look_up(node))
+            elif kind is Expr.Literal:
+                values.append(node.value)
+            elif kind is tuple:
+                step, node = node
+                if step == BINARY:
+                    right = values.pop()
+                    values.append(self.binary(node.operator, values.pop(), right))
+                elif step == UNARY:
+                    values.append(self.unary(node.operator, values.pop()))
+                elif step == LOGICAL:
+                    # the left value stays as the result when it decides it, otherwise the right one replaces it
+                    left = values[-1]
+                    falsey = left is None or left is False
+                    if falsey == (node.operator.type == TokenType.OR):
+                        values.pop()
+                        work.append(node.right)
+                elif step == ASSIGN:
+                    values.append(self.assign(node, values.pop()))
+                else:
+                    count = len(node.arguments)
+                    arguments = values[len(values) - count:]
+                    del values[len(values) - count:]
+                    values.append(self.call(values.pop(), node.paren, arguments))
+            elif kind is Expr.Grouping:
+                work.append(node.expression)
+            elif kind is Expr.Binary:
+                work.append((BINARY, node))
+                work.append(node.right)
+                work.append(node.left)
+            elif kind is Expr.Unary:
+                work.append((UNARY, node))
+                work.append(node.right)
+            elif kind is Expr.Logical:
+                work.append((LOGICAL, node))
+                work.append(node.left)
+            elif kind is Expr.Assign:
+                work.append((ASSIGN, node))
+                work.append(node.value)
+            elif kind is Expr.Call:
+                work.append((CALL, node))
+                work.extend(reversed(node.arguments))
+                work.append(node.callee)
+            else:
+                values.append(node.accept(self))
+
+        return values.pop()
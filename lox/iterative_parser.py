@@ -0,0 +1,181 @@
+from . import Expr
+from collections.abc import Iterable
+from .tokens import Token
+from .token_type import TokenType
+from .errors import ErrorReporter
+from .parser import Parser, StreamParser, MAX_ARGUMENTS
+
+# binding power of the binary operators, one level per grammar rule, higher binds tighter
+# assignment binds loosest and is the only right associative one
+PRECEDENCE = {
+    TokenType.EQUAL: 0,
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.BANG_EQUAL: 3, TokenType.EQUAL_EQUAL: 3,
+    TokenType.GREATER: 4, TokenType.GREATER_EQUAL: 4, TokenType.LESS: 4, TokenType.LESS_EQUAL: 4,
+    TokenType.MINUS: 5, TokenType.PLUS: 5,
+    TokenType.SLASH: 6, TokenType.STAR: 6,
+}
+
+LITERALS = {
+    TokenType.FALSE: False,
+    TokenType.TRUE: True,
+    TokenType.NIL: None,
+}
+
+# default limit on the number of operators waiting for an operand (open parentheses and calls, prefix and binary
+# operators), callers can pass another one
+MAX_DEPTH = 100000
+
+# markers on the operator stack, binary operators are pushed as their bare token
+UNARY = 0
+GROUP = 1
+CALL = 2
+
+
+class IterativeParser(Parser):
+    """
+    Precedence climbing parser that keeps pending operators on an explicit stack instead of making one python
+    call per grammar rule, so deeply nested input can't hit python's recursion limit.
+    It builds the same trees as Parser, Grouping nodes included, and reports the same errors.
+    The arguments of a call are parsed on the same stacks, so nested calls don't recurse either.
+    Input nested deeper than max_depth is reported as a syntax error.
+    """
+
+    def __init__(self, tokens: list[Token], reporter: ErrorReporter | None = None, max_depth: int = MAX_DEPTH):
+        super().__init__(tokens, reporter)
+        self.max_depth = max_depth
+
+    def expression(self):
+        operands = []
+        # tokens of binary operators, (UNARY, token) for prefix operators, (GROUP, token) for "(" and
+        # (CALL, callee, arguments) for a call whose arguments are being parsed
+        operators = []
+
+        while True:
+            # an operand is expected: any number of prefix operators and "(" followed by a literal or a variable
+            while True:
+                token = self.peek()
+                if token.type == TokenType.BANG or token.type == TokenType.MINUS:
+                    operators.append((UNARY, self.advance()))
+                elif token.type == TokenType.LEFT_PAREN:
+                    operators.append((GROUP, self.advance()))
+                else:
+                    break
+                if len(operators) > self.max_depth:
+                    raise self.error(token, "Expression nesting too deep.")
+
+            if token.type in LITERALS:
+                self.advance()
+                operands.append(self.make_literal(token, LITERALS[token.type]))
+            elif token.type == TokenType.NUMBER or token.type == TokenType.STRING:
+                self.advance()
+                operands.append(self.make_literal(token, token.literal))
+            elif token.type == TokenType.IDENTIFIER:
+                self.advance()
+                operands.append(self.make_variable(token))
+            else:
+                raise self.error(token, "Expect expression.")
+
+            while True:
+                # calls bind tighter than prefix operators, each argument is parsed like a parenthesized operand
+                if self.match(TokenType.LEFT_PAREN):
+                    paren = self.previous()
+                    self.open_call(paren)
+                    if not self.check(TokenType.RIGHT_PAREN):
+                        operators.append((CALL, operands.pop(), []))
+                        if len(operators) > self.max_depth:
+                            raise self.error(paren, "Expression nesting too deep.")
+                        break
+                    operands.append(self.make_call(operands.pop(), self.advance(), []))
+                    continue
+
+                # prefix operators bind tighter than any binary operator, apply them to the operand right away
+                while operators and type(operators[-1]) is tuple and operators[-1][0] == UNARY:
+                    operands.append(self.make_unary(operators.pop()[1], operands.pop()))
+
+                token = self.peek()
+                precedence = PRECEDENCE.get(token.type)
+                if precedence is not None:
+                    # left associative operators finish the pending ones that bind at least as tight,
+                    # assignment only the ones that bind tighter
+                    self.reduce(operands, operators, precedence + 1 if precedence == 0 else precedence)
+                    operators.append(self.advance())
+                    if len(operators) > self.max_depth:
+                        raise self.error(token, "Expression nesting too deep.")
+                    break
+
+                # no operator follows, the innermost open expression is complete
+                self.reduce(operands, operators, 0)
+                if not operators:
+                    return operands.pop()
+                if operators[-1][0] == GROUP:
+                    self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+                    operands.append(self.make_grouping(operators.pop()[1], operands.pop()))
+                    continue
+
+                # an argument is complete, another one follows a ","
+                _, callee, arguments = operators[-1]
+                arguments.append(operands.pop())
+                if self.match(TokenType.COMMA):
+                    if len(arguments) >= MAX_ARGUMENTS:
+                        # the parser isn't confused, no need to raise and synchronize
+                        self.error(self.peek(), f"Can't have more than {MAX_ARGUMENTS} arguments.")
+                    break
+                paren = self.consume(TokenType.RIGHT_PAREN, "Expect ')' after arguments.")
+                operators.pop()
+                operands.append(self.make_call(callee, paren, arguments))
+
+    def reduce(self, operands, operators, precedence):
+        # pops binary operators of at least the given precedence, stops at a "(" or a prefix operator
+        while operators and type(operators[-1]) is not tuple and PRECEDENCE[operators[-1].type] >= precedence:
+            right = operands.pop()
+            operator = operators.pop()
+            if operator.type == TokenType.EQUAL:
+                operands.append(self.make_assign(operands.pop(), operator, right))
+            elif operator.type == TokenType.OR or operator.type == TokenType.AND:
+                operands.append(self.make_logical(operands.pop(), operator, right))
+            else:
+                operands.append(self.make_binary(operands.pop(), operator, right))
+
+    # node constructors, nodes are always built after their children
+    # subclasses override them to build another representation of the tree
+    def make_literal(self, token, value):
+        return Expr.Literal(value)
+
+    def make_grouping(self, paren, expression):
+        return Expr.Grouping(expression)
+
+    def make_unary(self, operator, right):
+        return Expr.Unary(operator, right)
+
+    def make_binary(self, left, operator, right):
+        return Expr.Binary(left, operator, right)
+
+    def make_logical(self, left, operator, right):
+        return Expr.Logical(left, operator, right)
+
+    def open_call(self, paren):
+        # called at the "(" of a call, before its arguments are parsed
+        pass
+
+    def make_call(self, callee, paren, arguments):
+        return Expr.Call(callee, paren, arguments)
+
+    def make_variable(self, name):
+        self.names += 1
+        return Expr.Variable(name)
+
+    def make_assign(self, target, equals, value):
+        if isinstance(target, Expr.Variable):
+            return Expr.Assign(target.name, value)
+        # reported like Parser.assignment does, without giving up on the expression
+        self.error(equals, "Invalid assignment target.")
+        return target
+
+
+class IterativeStreamParser(IterativeParser, StreamParser):
+    """IterativeParser pulling its tokens lazily from an iterator, like StreamParser."""
+
+    def __init__(self, tokens: Iterable[Token], reporter: ErrorReporter | None = None, max_depth: int = MAX_DEPTH):
+        super().__init__(tokens, reporter, max_depth)
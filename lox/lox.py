@@ -1,70 +1,63 @@
 import sys
-from sys import argv
-from scanner import Scanner
-from tokens import  Token
-from token_type import TokenType
-from parser import Parser
-from ast_printer import AstPrinter
-from interpreter import Interpreter
-from runtime_error import LoxRuntimeError
-class Lox:
-    had_error = False
-    had_runtime_error = False
-    interpreter = Interpreter()
+from .session import Session
 
-    @staticmethod
-    def scanner_error(line: int, message: str):
-        Lox.report(line, "", message)
 
-    @staticmethod
-    def error(token: Token, message: str):
-        if token.type == TokenType.EOF:
-            Lox.report(token.line, ' at end', message)
-        else:
-            Lox.report(token.line,f" at '{token.lexeme}'", message)
+class Lox:
+    """
+    Command line front end: runs a script or the REPL in a single session.
+    Code that needs several independent runs (threads, servers, batches) should create its own Session.
+    """
+    session = Session()
+    # "text" or "json" when --stats was given: every run is instrumented and its stats printed to stderr
+    stats_format = None
+    # set by --print-ast: the tree of every run is printed after it was evaluated
+    print_ast = False
+    # "text" or "json" when --check was given: the script is checked for errors instead of run
+    check_format = None
 
     @staticmethod
-    def runtime_error(error: LoxRuntimeError):
-        print(f"{error}\n[line {error.token.line}]",file=sys.stderr)
-        Lox.had_runtime_error = True
+    def new_stats():
+        # a Stats object to fill when --stats was given, None otherwise; the stats module is only imported then
+        if not Lox.stats_format: return None
+        from .stats import Stats
+        return Stats()
 
     @staticmethod
-    def report(line: int, where: str, message: str) -> None:
-        print(f"[line {line}] Error{where}: {message}", file=sys.stderr)
-        Lox.had_error = True
+    def run_file(filename, scanner="default", stream=False, engine="tree", optimize=False, cache=False,
+                 parser="recursive", mmap=False, max_depth=None):
+        stats = Lox.new_stats()
+        status = Lox.session.run_file(filename, scanner, stream, engine, optimize, cache, stats, parser, mmap,
+                                      Lox.print_ast, max_depth)
+        if stats is not None:
+            stats.emit(sys.stderr, Lox.stats_format)
+        exit(status)
 
     @staticmethod
-    def run_file(filename):
-        with open(filename) as file:
-            file_contents = file.read()
-
-        Lox.run(file_contents)
-
-        if Lox.had_error:
-            exit(65)
-        elif Lox.had_runtime_error:
-            exit(70)
+    def check_file(filename):
+        # prints every error of the script at once, without running it; exits 65 if there was any
+        from .diagnostics import check_file
+        try:
+            diagnostics = check_file(filename)
+        except OSError as error:
+            print(f"Can't read {filename}: {error.strerror}", file=sys.stderr)
+            exit(66)
+        if Lox.check_format == "json":
+            import json
+            print(json.dumps([diagnostic.to_dict() for diagnostic in diagnostics], indent=2))
         else:
-            exit(0)
+            for diagnostic in diagnostics:
+                print(f"{filename}:{diagnostic}", file=sys.stderr)
+        exit(65 if diagnostics else 0)
 
     @staticmethod
-    def run(source):
-        if source:
-            scanner = Scanner(source)
-            scanner.scan_tokens()
-            # for token in scanner.tokens:
-            #     print(token)
-            parser = Parser(scanner.tokens)
-            expression = parser.parse()
-
-            # stop if there is syntax error
-            if Lox.had_error: return
-
-            Lox.interpreter.interpret(expression)
-            printer = AstPrinter()
-            print(printer.print(expression))
-        else:
-            print("EOF  null")
+    def run(source, scanner="default", stream=False, engine="tree", optimize=False, cache=False,
+            parser="recursive", max_depth=None):
+        stats = Lox.new_stats()
+        expression = Lox.session.run(source, scanner, stream, engine, optimize, cache, stats, parser,
+                                     Lox.print_ast, max_depth)
+        if stats is not None:
+            stats.emit(sys.stderr, Lox.stats_format)
+        return expression
 
     @staticmethod
     def run_prompt():
@@ -76,15 +69,36 @@ class Lox:
                     exit()
                 else:
                     Lox.run(expr)
-                    Lox.had_error = False
+                    Lox.session.had_error = False
             except Exception as e:
                 print(f"Error: {e}")
 
     @staticmethod
     def main(args):
+        # options start with --, everything else is the script
+        mmap = False
+        for option in [arg for arg in args if arg.startswith('--')]:
+            if option == '--stats':
+                Lox.stats_format = "text"
+            elif option == '--stats=json':
+                Lox.stats_format = "json"
+            elif option == '--mmap':
+                mmap = True
+            elif option == '--print-ast':
+                Lox.print_ast = True
+            elif option == '--check':
+                Lox.check_format = "text"
+            elif option == '--check=json':
+                Lox.check_format = "json"
+            else:
+                exit(64)
+        args = [arg for arg in args if not arg.startswith('--')]
+
         if len(args) > 1:
             exit(64)
+        elif len(args) == 1 and Lox.check_format:
+            Lox.check_file(args[0])
         elif len(args) == 1:
-            Lox.run_file(args[0])
+            Lox.run_file(args[0], mmap=mmap)
         else:
             Lox.run_prompt()
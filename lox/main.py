@@ -1,5 +1,28 @@
-from sys import argv
-from lox import Lox
+import os
+import sys
+
+if __name__ == "__main__" and not __package__:
+    # started as python lox/main.py: the directory holding the package goes on the path in place of lox/ itself,
+    # whose modules would otherwise shadow the package (lox/lox.py) and the standard library
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from lox.lox import Lox
+
+
+def main(args):
+    if args[:1] == ["--many"]:
+        # python main.py --many [options] paths... runs many scripts in parallel
+        from lox import runner
+        exit(runner.main(args[1:]))
+    if args[:1] == ["--serve"]:
+        # python main.py --serve [--socket PATH | --stdio] answers requests of client.py until interrupted
+        from lox import server
+        exit(server.main(args[1:]))
+    # python main.py [--stats | --stats=json] [script] prints per phase timings and counters to stderr
+    # python main.py --mmap script memory maps the script instead of reading it
+    # python main.py [--check | --check=json] script reports every error of the script without running it
+    Lox.main(args)
+
 
 if __name__ == "__main__":
-    Lox.main(argv[1:])
+    main(sys.argv[1:])
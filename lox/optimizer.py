@@ -0,0 +1,192 @@
+from . import Expr, Stmt
+from .token_type import TokenType
+from .runtime_error import LoxRuntimeError
+from .interpreter import Interpreter
+from .rope import Rope
+
+# operators that always produce a number (or fail on their own operator)
+NUMERIC_OPERATORS = (TokenType.MINUS, TokenType.STAR, TokenType.SLASH)
+# operators that always produce a boolean
+BOOLEAN_OPERATORS = (TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+                     TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL)
+
+
+class Optimizer(Expr.ExprVisitor, Stmt.StmtVisitor):
+    """
+    Rewrites an expression tree before it is interpreted:
+     - Binary and Unary nodes whose operands are all literals are evaluated once and replaced by a Literal
+     - Grouping nodes are dropped, the tree structure already encodes the precedence
+     - double negations (- -x, !!x) are removed when x is already of the type the negations would produce
+     - "and" and "or" with a literal left operand are replaced by the operand that decides their value
+    A node that would raise a LoxRuntimeError is never folded, it is kept as is so the error is raised
+    at run time with the same operator token, line and message.
+    Programs are rewritten statement by statement, what the resolver stored on the nodes is kept. Expressions
+    are rewritten with an explicit stack, so the optimizer takes trees as deep as the iterative parser builds.
+    """
+
+    def __init__(self):
+        self.folder = Interpreter()
+
+    def optimize(self, tree):
+        # tree is a program (list of statements) or a single expression
+        if type(tree) is list:
+            return [statement.accept(self) for statement in tree]
+        return self.optimize_expression(tree)
+
+    def fold(self, expr: Expr.Expr) -> Expr.Expr:
+        # expr only has literal operands, try to evaluate it right now
+        try:
+            value = self.folder.evaluate(expr)
+        except (LoxRuntimeError, ArithmeticError):
+            return expr
+        # a literal holds the joined text, the tree may be printed or cached
+        return Expr.Literal(str(value) if type(value) is Rope else value)
+
+    def optimize_expression(self, expr: Expr.Expr) -> Expr.Expr:
+        # expressions can nest deeper than python's recursion limit, they are rewritten with an explicit stack:
+        # a node is rewritten once its operands were, from the values they left on the results stack
+        results = []
+        # (node, True) entries are nodes waiting for their rewritten operands
+        work = [(expr, False)]
+        while work:
+            node, ready = work.pop()
+            kind = type(node)
+            if ready:
+                if kind is Expr.Binary:
+                    right = results.pop()
+                    results.append(self.binary(node, results.pop(), right))
+                elif kind is Expr.Unary:
+                    results.append(self.unary(node, results.pop()))
+                elif kind is Expr.Logical:
+                    right = results.pop()
+                    results.append(self.logical(node, results.pop(), right))
+                elif kind is Expr.Assign:
+                    results.append(Expr.Assign(node.name, results.pop(), node.depth, node.slot))
+                else:
+                    count = len(node.arguments)
+                    arguments = results[len(results) - count:]
+                    del results[len(results) - count:]
+                    results.append(Expr.Call(results.pop(), node.paren, arguments))
+            elif kind is Expr.Grouping:
+                # dropped, the tree structure already encodes the precedence
+                work.append((node.expression, False))
+            elif kind is Expr.Binary or kind is Expr.Logical:
+                work.append((node, True))
+                work.append((node.right, False))
+                work.append((node.left, False))
+            elif kind is Expr.Unary:
+                work.append((node, True))
+                work.append((node.right, False))
+            elif kind is Expr.Assign:
+                work.append((node, True))
+                work.append((node.value, False))
+            elif kind is Expr.Call:
+                work.append((node, True))
+                work.extend((argument, False) for argument in reversed(node.arguments))
+                work.append((node.callee, False))
+            else:
+                # literals and variables stay as they are
+                results.append(node)
+        return results.pop()
+
+    def unary(self, expr: 'Expr.Unary', right: Expr.Expr) -> Expr.Expr:
+        if isinstance(right, Expr.Literal):
+            return self.fold(Expr.Unary(expr.operator, right))
+
+        if isinstance(right, Expr.Unary) and right.operator.type == expr.operator.type:
+            inner = right.right
+            if expr.operator.type == TokenType.MINUS and self.is_numeric(inner):
+                return inner
+            if expr.operator.type == TokenType.BANG and self.is_boolean(inner):
+                return inner
+
+        return Expr.Unary(expr.operator, right)
+
+    def binary(self, expr: 'Expr.Binary', left: Expr.Expr, right: Expr.Expr) -> Expr.Expr:
+        if isinstance(left, Expr.Literal) and isinstance(right, Expr.Literal):
+            return self.fold(Expr.Binary(left, expr.operator, right))
+
+        return Expr.Binary(left, expr.operator, right)
+
+    def logical(self, expr: 'Expr.Logical', left: Expr.Expr, right: Expr.Expr) -> Expr.Expr:
+        if isinstance(left, Expr.Literal):
+            truthy = self.folder.is_truthy(left.value)
+            if expr.operator.type == TokenType.OR:
+                return left if truthy else right
+            return right if truthy else left
+
+        return Expr.Logical(left, expr.operator, right)
+
+    # every expression is rewritten by optimize_expression, whichever node it starts at
+    def visit_literal_expr(self, expr: 'Expr.Literal'):
+        return self.optimize_expression(expr)
+
+    def visit_grouping_expr(self, expr: 'Expr.Grouping'):
+        return self.optimize_expression(expr)
+
+    def visit_unary_expr(self, expr: 'Expr.Unary'):
+        return self.optimize_expression(expr)
+
+    def visit_binary_expr(self, expr: 'Expr.Binary'):
+        return self.optimize_expression(expr)
+
+    def visit_variable_expr(self, expr: 'Expr.Variable'):
+        return self.optimize_expression(expr)
+
+    def visit_assign_expr(self, expr: 'Expr.Assign'):
+        return self.optimize_expression(expr)
+
+    def visit_logical_expr(self, expr: 'Expr.Logical'):
+        return self.optimize_expression(expr)
+
+    def visit_call_expr(self, expr: 'Expr.Call'):
+        return self.optimize_expression(expr)
+
+    def visit_block_stmt(self, stmt: 'Stmt.Block'):
+        return Stmt.Block(self.optimize(stmt.statements), stmt.size)
+
+    def visit_function_stmt(self, stmt: 'Stmt.Function'):
+        return Stmt.Function(stmt.name, stmt.params, self.optimize(stmt.body), stmt.depth, stmt.slot, stmt.size,
+                             stmt.pooled)
+
+    def visit_if_stmt(self, stmt: 'Stmt.If'):
+        else_branch = None if stmt.else_branch is None else stmt.else_branch.accept(self)
+        return Stmt.If(self.optimize_expression(stmt.condition), stmt.then_branch.accept(self), else_branch)
+
+    def visit_return_stmt(self, stmt: 'Stmt.Return'):
+        return Stmt.Return(stmt.keyword, None if stmt.value is None else self.optimize_expression(stmt.value))
+
+    def visit_while_stmt(self, stmt: 'Stmt.While'):
+        return Stmt.While(self.optimize_expression(stmt.condition), stmt.body.accept(self))
+
+    def visit_expression_stmt(self, stmt: 'Stmt.Expression'):
+        return Stmt.Expression(self.optimize_expression(stmt.expression))
+
+    def visit_print_stmt(self, stmt: 'Stmt.Print'):
+        return Stmt.Print(self.optimize_expression(stmt.expression))
+
+    def visit_var_stmt(self, stmt: 'Stmt.Var'):
+        initializer = None if stmt.initializer is None else self.optimize_expression(stmt.initializer)
+        return Stmt.Var(stmt.name, initializer, stmt.depth, stmt.slot)
+
+    @staticmethod
+    def is_numeric(expr: Expr.Expr) -> bool:
+        # expressions that either evaluate to a number or raise their own error
+        if isinstance(expr, Expr.Literal):
+            return type(expr.value) == float
+        if isinstance(expr, Expr.Unary):
+            return expr.operator.type == TokenType.MINUS
+        if isinstance(expr, Expr.Binary):
+            return expr.operator.type in NUMERIC_OPERATORS
+        return False
+
+    @staticmethod
+    def is_boolean(expr: Expr.Expr) -> bool:
+        # expressions that either evaluate to a boolean or raise their own error
+        if isinstance(expr, Expr.Literal):
+            return type(expr.value) == bool
+        if isinstance(expr, Expr.Unary):
+            return expr.operator.type == TokenType.BANG
+        if isinstance(expr, Expr.Binary):
+            return expr.operator.type in BOOLEAN_OPERATORS
+        return False
@@ -0,0 +1,223 @@
+import os
+import stat
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from . import Expr, Stmt
+
+# bump whenever the AST classes or the entries change shape, so stale pickles are never loaded
+CACHE_FORMAT = 5
+
+
+def cache_dir() -> str:
+    # per user directory of the on-disk cache: $LOX_CACHE_DIR, else lox/ in $XDG_CACHE_HOME or ~/.cache
+    directory = os.environ.get("LOX_CACHE_DIR")
+    if not directory:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(base, "lox")
+    return directory
+
+
+def private_dir(directory: str) -> bool:
+    # makes the directory if needed, True if only the current user can write to it
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.stat(directory)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode) or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    return not hasattr(os, "getuid") or info.st_uid == os.getuid()
+
+
+def tree_classes() -> dict[tuple[str, str], object]:
+    # (module, name) -> object of everything a pickled tree refers to, nothing else can be loaded
+    from . import tokens, token_type, arena
+    from array import array, _array_reconstructor
+    classes = {(module.__name__, name): value
+               for module in (Expr, Stmt) for name, value in vars(module).items()
+               if isinstance(value, type) and issubclass(value, (Expr.Expr, Stmt.Stmt))}
+    classes.update({
+        (tokens.__name__, "Token"): tokens.Token,
+        (tokens.__name__, "NO_LITERAL"): tokens.NO_LITERAL,
+        (token_type.__name__, "TokenType"): token_type.TokenType,
+        (arena.__name__, "Arena"): arena.Arena,
+        # the arrays of an Arena
+        ("array", "array"): array,
+        ("array", "_array_reconstructor"): _array_reconstructor,
+    })
+    return classes
+
+
+class TreeUnpickler(pickle.Unpickler):
+    """
+    Unpickler that only builds AST nodes, tokens and plain values. pickle.load would call anything a file names,
+    this one refuses every global that isn't part of a tree, so a tampered cache file can't run code.
+    """
+    classes: dict[tuple[str, str], object] | None = None
+
+    def find_class(self, module: str, name: str):
+        if TreeUnpickler.classes is None:
+            TreeUnpickler.classes = tree_classes()
+        value = TreeUnpickler.classes.get((module, name))
+        if value is None:
+            raise pickle.UnpicklingError(f"{module}.{name} is not part of a tree")
+        return value
+
+
+def source_key(source, optimize: bool = False, scanner: str = "default", parser: str = "recursive") -> str:
+    # the trees a source gives with other options are different entries: optimized or not, nodes or an arena
+    # source is a str or its utf-8 bytes (e.g. a memory mapped file), both give the same key
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    digest = hashlib.sha256(source).hexdigest()
+    return f"{digest}:{int(optimize)}:{scanner}:{parser}"
+
+
+class ParseCache:
+    """
+    In-process LRU cache from the hash of a source (see source_key) to its parsed AST.
+    Only ASTs of sources without syntax errors are stored, a hit means scanning and parsing can be skipped.
+    It is shared by all sessions, so every access holds a lock.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.lock = threading.Lock()
+        self.maxsize = maxsize
+        self.entries: OrderedDict[str, Expr.Expr] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Expr.Expr | None:
+        with self.lock:
+            expr = self.entries.get(key)
+            if expr is None:
+                self.misses += 1
+                return None
+            # mark it as the most recently used entry
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return expr
+
+    def put(self, key: str, expr: Expr.Expr):
+        with self.lock:
+            self.entries[key] = expr
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache:
+    """
+    On-disk cache of pickled ASTs for .lox files, the __pycache__ of lox.
+    Entries live in a per user directory (see cache_dir), named after the hash of the absolute path of the
+    script, together with the mtime, size and hash of the source they were built from. An entry is used as is
+    while mtime and size match; when they don't, the source is hashed and the entry is still used (and
+    refreshed) if the contents didn't change.
+    The cache is only used when its directory belongs to the current user and nobody else can write to it, and
+    entries are read with TreeUnpickler, so a cache file can hold a tree but never code.
+    Failing to read or write the cache is never an error, we just parse the file.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or cache_dir()
+        # checked on first use, None until then
+        self.usable: bool | None = None
+
+    def path(self, filename: str) -> str | None:
+        # None when the cache directory can't be trusted
+        if self.usable is None:
+            self.usable = private_dir(self.directory)
+        if not self.usable:
+            return None
+        name = hashlib.sha256(os.path.abspath(filename).encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.directory, f"{name}.pickle")
+
+    def lookup(self, filename: str, optimize: bool = False, source=None, scanner: str = "default",
+               parser: str = "recursive") -> tuple[Expr.Expr | None, str | None]:
+        """
+        Returns (ast, source). ast is None on a miss. source is only read when the fast mtime/size check
+        fails, so on a miss the caller can reuse it instead of reading the file again.
+        A source the caller already has (e.g. the memory mapped file) is hashed instead of reading the file.
+        Only an entry stored with the same optimize, scanner and parser is a hit.
+        """
+        info = os.stat(filename)
+        entry = self.read(filename)
+        options = (optimize, scanner, parser)
+        if entry is not None and entry["options"] == options \
+                and entry["mtime"] == info.st_mtime_ns and entry["size"] == info.st_size:
+            return entry["ast"], source
+
+        if source is None:
+            with open(filename) as file:
+                source = file.read()
+
+        if entry is not None and entry["options"] == options and entry["key"] == source_key(source, *options):
+            # only the timestamp changed, e.g. the file was touched
+            self.store(filename, source, entry["ast"], *options)
+            return entry["ast"], source
+
+        return None, source
+
+    def read(self, filename: str) -> dict | None:
+        path = self.path(filename)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as file:
+                entry = TreeUnpickler(file).load()
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError,
+                ValueError, KeyError):
+            return None
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT:
+            return None
+        return entry
+
+    def store(self, filename: str, source, expr: Expr.Expr, optimize: bool = False, scanner: str = "default",
+              parser: str = "recursive"):
+        path = self.path(filename)
+        if path is None:
+            return
+        try:
+            info = os.stat(filename)
+            entry = {
+                "format": CACHE_FORMAT,
+                "mtime": info.st_mtime_ns,
+                "size": info.st_size,
+                "key": source_key(source, optimize, scanner, parser),
+                "options": (optimize, scanner, parser),
+                "ast": expr,
+            }
+            # write to a temporary file and move it in place, so readers never see a half written entry
+            temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except (OSError, RecursionError, pickle.PicklingError):
+            pass
+
+    def invalidate(self, filename: str):
+        path = self.path(filename)
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
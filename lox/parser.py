@@ -1,22 +1,65 @@
-import Expr
-from tokens import Token
-from token_type import TokenType
+from . import Expr, Stmt
+from collections import deque
+from collections.abc import Iterable
+from .tokens import Token
+from .errors import ErrorReporter
+from .token_type import TokenType
 
 """
 The rules for lox are:
 
-expression     → equality ;
+program        → declaration* EOF ;
+declaration    → funDecl
+               | varDecl
+               | statement ;
+funDecl        → "fun" IDENTIFIER "(" parameters? ")" block ;
+parameters     → IDENTIFIER ( "," IDENTIFIER )* ;
+varDecl        → "var" IDENTIFIER ( "=" expression )? ";" ;
+statement      → exprStmt
+               | forStmt
+               | ifStmt
+               | printStmt
+               | returnStmt
+               | whileStmt
+               | block ;
+exprStmt       → expression ";" ;
+forStmt        → "for" "(" ( varDecl | exprStmt | ";" ) expression? ";" expression? ")" statement ;
+ifStmt         → "if" "(" expression ")" statement ( "else" statement )? ;
+printStmt      → "print" expression ";" ;
+returnStmt     → "return" expression? ";" ;
+whileStmt      → "while" "(" expression ")" statement ;
+block          → "{" declaration* "}" ;
+
+expression     → assignment ;
+assignment     → IDENTIFIER "=" assignment
+               | logic_or ;
+logic_or       → logic_and ( "or" logic_and )* ;
+logic_and      → equality ( "and" equality )* ;
 equality       → comparison ( ( "!=" | "==" ) comparison )* ;
 comparison     → term ( ( ">" | ">=" | "<" | "<=" ) term )* ;
 term           → factor ( ( "-" | "+" ) factor )* ;
 factor         → unary ( ( "/" | "*" ) unary )* ;
 unary          → ( "!" | "-" ) unary
-               | primary ;
+               | call ;
+call           → primary ( "(" arguments? ")" )* ;
+arguments      → expression ( "," expression )* ;
 primary        → NUMBER | STRING | "true" | "false" | "nil"
-               | "(" expression ")" ;
+               | "(" expression ")" | IDENTIFIER ;
 
+A source that is a single expression without a ";" is not a program, it is parsed as that expression and
+its value is printed.
+
+A syntax error doesn't stop the parser: the declaration holding it is dropped, the parser skips ahead to the
+next statement boundary (see synchronize) and goes on, so every error of a source is reported in one pass.
 """
 
+# tokens that can only start a statement, a source starting with one of them is a program
+STATEMENT_START = (TokenType.FUN, TokenType.VAR, TokenType.FOR, TokenType.IF, TokenType.PRINT, TokenType.RETURN,
+                   TokenType.WHILE, TokenType.LEFT_BRACE)
+
+# most parameters a function and arguments a call can have
+MAX_ARGUMENTS = 255
+
 
 class ParseError(RuntimeError):
     def __init__(self, token: Token, message: str) -> None:
@@ -32,11 +75,20 @@ class Parser:
      leaves of the syntax tree.
     """
 
-    def __init__(self, tokens: list[Token]):
+    def __init__(self, tokens: list[Token], reporter: ErrorReporter | None = None):
+        # syntax errors are sent to the reporter of the run this parser belongs to
+        self.reporter = reporter or ErrorReporter()
+        self.reset(tokens)
+
+    def reset(self, tokens: list[Token]):
         # consumes a flat input sequence of tokens
         # current points to the next token waiting to be parsed
         self.current = 0
         self.tokens = tokens
+        # declarations, variable references and returns parsed, the resolver has nothing to do when there are none
+        self.names = 0
+        # syntax errors reported so far, raised or not
+        self.error_count = 0
 
     def is_at_end(self) -> bool:
         """
@@ -74,15 +126,15 @@ class Parser:
     def consume(self, type, message):
         # if the next token is of the expected type
         if self.check(type): return self.advance()
-        return self.error(self.peek(), message)
+        raise self.error(self.peek(), message)
 
-    @staticmethod
-    def error(token, message) -> ParseError:
-        from lox import Lox
-        Lox.error(token, message)
+    def error(self, token, message) -> ParseError:
+        self.error_count += 1
+        self.reporter.error(token, message)
         return ParseError(token, message)
 
     def synchronize(self):
+        # discards tokens until the start of the next statement, most likely past the one with the error
         self.advance()
 
         while not self.is_at_end():
@@ -101,9 +153,165 @@ class Parser:
                 return
             self.advance()
 
-    # rule 1: expressions -> equality
+    def program(self, statements: list[Stmt.Stmt]) -> list[Stmt.Stmt]:
+        while not self.is_at_end():
+            statement = self.declaration()
+            if statement is not None:
+                statements.append(statement)
+        return statements
+
+    def declaration(self):
+        # None when the declaration has a syntax error, the parser is then at the start of the next statement
+        try:
+            if self.match(TokenType.FUN): return self.function("function")
+            if self.match(TokenType.VAR): return self.var_declaration()
+            return self.statement()
+        except ParseError:
+            self.synchronize()
+            return None
+
+    def function(self, kind: str):
+        name: Token = self.consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
+        self.consume(TokenType.LEFT_PAREN, f"Expect '(' after {kind} name.")
+        params: list[Token] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            while True:
+                if len(params) >= MAX_ARGUMENTS:
+                    self.error(self.peek(), f"Can't have more than {MAX_ARGUMENTS} parameters.")
+                params.append(self.consume(TokenType.IDENTIFIER, "Expect parameter name."))
+                if not self.match(TokenType.COMMA): break
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
+        self.consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
+        body = self.block()
+        self.names += 1
+        return Stmt.Function(name, params, body)
+
+    def var_declaration(self):
+        name: Token = self.consume(TokenType.IDENTIFIER, "Expect variable name.")
+        initializer = None
+        if self.match(TokenType.EQUAL):
+            initializer = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
+        self.names += 1
+        return Stmt.Var(name, initializer)
+
+    def statement(self):
+        if self.match(TokenType.FOR): return self.for_statement()
+        if self.match(TokenType.IF): return self.if_statement()
+        if self.match(TokenType.PRINT): return self.print_statement()
+        if self.match(TokenType.RETURN): return self.return_statement()
+        if self.match(TokenType.WHILE): return self.while_statement()
+        if self.match(TokenType.LEFT_BRACE): return Stmt.Block(self.block())
+        return self.expression_statement()
+
+    def for_statement(self):
+        # there is no for node, the loop is desugared into a while loop in blocks
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
+        if self.match(TokenType.SEMICOLON):
+            initializer = None
+        elif self.match(TokenType.VAR):
+            initializer = self.var_declaration()
+        else:
+            initializer = self.expression_statement()
+
+        condition = None
+        if not self.check(TokenType.SEMICOLON):
+            condition = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after loop condition.")
+
+        increment = None
+        if not self.check(TokenType.RIGHT_PAREN):
+            increment = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
+
+        body: Stmt.Stmt = self.statement()
+        if increment is not None:
+            body = Stmt.Block([body, Stmt.Expression(increment)])
+        body = Stmt.While(condition if condition is not None else Expr.Literal(True), body)
+        if initializer is not None:
+            body = Stmt.Block([initializer, body])
+        return body
+
+    def if_statement(self):
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
+        condition: Expr.Expr = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after if condition.")
+        then_branch = self.statement()
+        # a dangling else belongs to the nearest if
+        else_branch = self.statement() if self.match(TokenType.ELSE) else None
+        return Stmt.If(condition, then_branch, else_branch)
+
+    def print_statement(self):
+        value: Expr.Expr = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after value.")
+        return Stmt.Print(value)
+
+    def return_statement(self):
+        keyword: Token = self.previous()
+        value = None
+        if not self.check(TokenType.SEMICOLON):
+            value = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after return value.")
+        self.names += 1
+        return Stmt.Return(keyword, value)
+
+    def while_statement(self):
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
+        condition: Expr.Expr = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after condition.")
+        return Stmt.While(condition, self.statement())
+
+    def expression_statement(self):
+        expr: Expr.Expr = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after expression.")
+        return Stmt.Expression(expr)
+
+    def block(self) -> list[Stmt.Stmt]:
+        statements = []
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            statement = self.declaration()
+            if statement is not None:
+                statements.append(statement)
+        self.consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
+        return statements
+
+    # rule 1: expressions -> assignment
     def expression(self):
-        return self.equality()
+        return self.assignment()
+
+    def assignment(self):
+        expr: Expr.Expr = self.logic_or()
+
+        if self.match(TokenType.EQUAL):
+            equals: Token = self.previous()
+            # assignment is right associative, the value is parsed as another assignment
+            value: Expr.Expr = self.assignment()
+            if isinstance(expr, Expr.Variable):
+                return Expr.Assign(expr.name, value)
+            # the parser isn't confused, no need to raise and synchronize
+            self.error(equals, "Invalid assignment target.")
+
+        return expr
+
+    def logic_or(self):
+        expr: Expr.Expr = self.logic_and()
+
+        while self.match(TokenType.OR):
+            operator: Token = self.previous()
+            right: Expr.Expr = self.logic_and()
+            expr = Expr.Logical(expr, operator, right)
+
+        return expr
+
+    def logic_and(self):
+        expr: Expr.Expr = self.equality()
+
+        while self.match(TokenType.AND):
+            operator: Token = self.previous()
+            right: Expr.Expr = self.equality()
+            expr = Expr.Logical(expr, operator, right)
+
+        return expr
 
     # rule 2: equality → comparison ( ( "!=" | "==" ) comparison )*
     def equality(self):
@@ -152,17 +360,42 @@ class Parser:
             right: Expr.Expr = self.unary()
             return Expr.Unary(operator, right)
 
-        # if we dont have - or !, it must be primary
-        return self.primary()
+        # if we dont have - or !, it must be a call or a primary
+        return self.call()
+
+    def call(self):
+        expr: Expr.Expr = self.primary()
+
+        while self.match(TokenType.LEFT_PAREN):
+            expr = self.finish_call(expr)
+
+        return expr
+
+    def finish_call(self, callee):
+        # the "(" was consumed, parses the arguments and the ")"
+        arguments: list[Expr.Expr] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            while True:
+                if len(arguments) >= MAX_ARGUMENTS:
+                    # the parser isn't confused, no need to raise and synchronize
+                    self.error(self.peek(), f"Can't have more than {MAX_ARGUMENTS} arguments.")
+                arguments.append(self.expression())
+                if not self.match(TokenType.COMMA): break
+        paren: Token = self.consume(TokenType.RIGHT_PAREN, "Expect ')' after arguments.")
+        return Expr.Call(callee, paren, arguments)
 
     def primary(self):
-        if self.match(TokenType.FALSE): return Expr.Literal("false")
-        if self.match(TokenType.TRUE): return Expr.Literal("true")
-        if self.match(TokenType.NIL): return Expr.Literal("nil")
+        if self.match(TokenType.FALSE): return Expr.Literal(False)
+        if self.match(TokenType.TRUE): return Expr.Literal(True)
+        if self.match(TokenType.NIL): return Expr.Literal(None)
 
         if self.match(TokenType.NUMBER, TokenType.STRING):
             return Expr.Literal(self.previous().literal)
 
+        if self.match(TokenType.IDENTIFIER):
+            self.names += 1
+            return Expr.Variable(self.previous())
+
         if self.match(TokenType.LEFT_PAREN):
             expr: Expr.Expr = self.expression()
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
@@ -171,8 +404,75 @@ class Parser:
         raise self.error(self.peek(), "Expect expression.")
 
     def parse(self):
+        # returns the expression of a source that is a single expression, otherwise the list of statements
+        # None when there's a syntax error, after every one of them was reported
+        try:
+            statements = []
+            if self.peek().type not in STATEMENT_START:
+                try:
+                    expr = self.expression()
+                    if self.is_at_end():
+                        return None if self.error_count else expr
+                    self.consume(TokenType.SEMICOLON, "Expect ';' after expression.")
+                    statements.append(Stmt.Expression(expr))
+                except ParseError:
+                    self.synchronize()
+            statements = self.program(statements)
+        except ParseError:
+            # parsers that can't recover give up on the whole source (see arena.py)
+            return None
+        return None if self.error_count else statements
+
+    def parse_expression(self):
+        # a single expression and nothing after it, for callers that only evaluate expressions (see batch.py)
         try:
-            return self.expression()
+            expr = self.expression()
+            if not self.is_at_end():
+                raise self.error(self.peek(), "Expect end of expression.")
+            return expr
         except ParseError:
             return None
 
+
+class StreamParser(Parser):
+    """
+    Parser variant that pulls tokens lazily from an iterator (e.g. Scanner.iter_tokens()) instead of
+    indexing a fully scanned list, so parsing starts before scanning is done and token memory stays bounded.
+    The grammar rules only ever look at the previous and the current token, so those two are all we keep,
+    in a two slot ring buffer.
+    """
+
+    def __init__(self, tokens: Iterable[Token], reporter: ErrorReporter | None = None):
+        super().__init__([], reporter)
+        self.stream = iter(tokens)
+        self.last = None
+        # window[0] is the previous token, window[1] is the current one waiting to be parsed
+        # appending to the full deque drops the oldest token
+        self.window = deque([None], maxlen=2)
+        self.window.append(self.next_token())
+
+    def next_token(self):
+        # once the stream is exhausted we keep handing out its last token, which is EOF
+        token = next(self.stream, None)
+        if token is None: return self.last
+        self.last = token
+        return token
+
+    def peek(self):
+        return self.window[1]
+
+    def previous(self):
+        return self.window[0]
+
+    def advance(self):
+        if not self.is_at_end():
+            self.current += 1
+            self.window.append(self.next_token())
+        return self.window[0]
+
+    def parse(self):
+        expr = super().parse()
+        # scan whatever is left so scanner errors past the parsed expression are still reported,
+        # just like they are when the whole source is scanned up front
+        for _ in self.stream: pass
+        return expr
@@ -0,0 +1,94 @@
+import re
+from .token_type import TokenType
+from .tokens import Token, KEYWORDS, FIXED_LEXEMES, NO_LITERAL
+from .scanner import Scanner
+
+# one alternative per kind of lexeme, tried in order at every position.
+# the order matters: "//" has to win over "/", and two character operators over their one character prefix
+TOKEN_PATTERN = re.compile(r"""
+    (?P<whitespace>[ \t\r]+)
+  | (?P<newline>\n)
+  | (?P<comment>//[^\n]*)
+  | (?P<number>[0-9]+(?:\.[0-9]+)?)
+  | (?P<identifier>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<string>"[^"]*")
+  | (?P<unterminated>"[^"]*)
+  | (?P<operator>==|!=|<=|>=|[(){},.\-+;*/=!<>])
+  | (?P<error>.)
+""", re.VERBOSE)
+
+# lexeme -> token type for every fixed punctuation/operator token
+OPERATORS = {token_type.value: token_type for token_type in TokenType
+             if token_type.value and not token_type.value.isalpha() and token_type != TokenType.STRING}
+
+
+class RegexScanner(Scanner):
+    """
+    Alternative scanning engine driven by a single compiled master regex.
+    Instead of calling advance()/peek() for every character, each match of TOKEN_PATTERN consumes a whole
+    lexeme (or run of whitespace) and the name of the matching group tells us what we found.
+    It produces the same tokens, line numbers and errors as Scanner.
+    """
+
+    def scan_tokens(self):
+        self.tokens.extend(self.iter_tokens())
+
+    def iter_tokens(self):
+        # generator version of the scanner, tokens are produced one at a time as the source is matched
+        source = self.source
+        for _, token in scan_with_offsets(source, 0, self.line, ReportedErrors(self.reporter)):
+            yield token
+
+        # every line break of the source was counted, strings included
+        self.line += source.count("\n")
+        self.start = self.current = len(source)
+        # at the end add EOF token
+        yield Token(TokenType.EOF, "", NO_LITERAL, self.line)
+
+
+class ReportedErrors:
+    """Stands in for the error list of scan_with_offsets, reporting every error as soon as it is found."""
+    __slots__ = ('reporter',)
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+
+    def append(self, error):
+        offset, line, message = error
+        self.reporter.scanner_error(line, message, offset)
+
+
+def scan_with_offsets(source: str, position: int, line: int, errors: list):
+    # (offset, token) of every token from position on, the scanner state there has to be the one at a token
+    # boundary, e.g. the start of the source. Same tokens as RegexScanner without EOF, errors are appended as
+    # (offset, line, message) instead of being reported.
+    operators = OPERATORS
+    keywords = KEYWORDS
+    lexemes = FIXED_LEXEMES
+    for match in TOKEN_PATTERN.finditer(source, position):
+        kind = match.lastgroup
+        if kind == 'whitespace' or kind == 'comment':
+            continue
+        text = match.group()
+        if kind == 'operator':
+            token_type = operators[text]
+            yield match.start(), Token(token_type, lexemes[token_type], NO_LITERAL, line)
+        elif kind == 'identifier':
+            token_type = keywords.get(text)
+            if token_type is None:
+                yield match.start(), Token(TokenType.IDENTIFIER, text, NO_LITERAL, line)
+            else:
+                yield match.start(), Token(token_type, lexemes[token_type], NO_LITERAL, line)
+        elif kind == 'number':
+            yield match.start(), Token(TokenType.NUMBER, text, float(text), line)
+        elif kind == 'newline':
+            line += 1
+        elif kind == 'string':
+            # strings may span lines, the token gets the line where the string ends
+            line += text.count("\n")
+            yield match.start(), Token(TokenType.STRING, text, text[1:-1], line)
+        elif kind == 'unterminated':
+            line += text.count("\n")
+            errors.append((match.start(), line, "Unterminated string."))
+        else:
+            errors.append((match.start(), line, f"Unexpected character: {text}"))
@@ -0,0 +1,157 @@
+from . import Expr, Stmt
+from .tokens import Token
+from .errors import ErrorReporter
+
+
+class Resolver(Stmt.StmtVisitor):
+    """
+    Static pass between parsing and running: works out where every variable lives (see environment.py) and
+    stores it on the nodes. Variable, Assign, Var and Function nodes get their depth and slot, blocks and
+    functions get the number of locals they declare so the interpreter can allocate their environment in one go.
+    A block declaring nothing gets no environment at all, size 0. A function declaring no other function gets
+    pooled set, none of its call frames can outlive the call (see functions.py).
+    Redeclaring a local in the same block, reading a local in its own initializer and returning from top-level
+    code are reported as errors.
+    Resolving a tree again gives the same result, so trees can be resolved once and then cached.
+    """
+
+    def __init__(self, reporter: ErrorReporter | None = None):
+        self.reporter = reporter or ErrorReporter()
+        # one dict per enclosing block, innermost last: name -> (slot, defined)
+        self.scopes: list[dict[str, tuple[int, bool]]] = []
+        # functions being resolved, innermost last
+        self.functions: list[Stmt.Function] = []
+
+    def resolve(self, tree):
+        # tree is a program (list of statements) or a single expression
+        if type(tree) is list:
+            for statement in tree:
+                statement.accept(self)
+        else:
+            self.resolve_expression(tree)
+
+    def resolve_expression(self, expr: Expr.Expr):
+        # expressions can nest deeper than python's recursion limit, they are walked with an explicit stack
+        # and nothing in an expression declares a variable, so the order of the walk doesn't matter
+        work = [expr]
+        while work:
+            node = work.pop()
+            kind = type(node)
+            if kind is Expr.Binary:
+                work.append(node.left)
+                work.append(node.right)
+            elif kind is Expr.Variable:
+                scope = self.scopes[-1] if self.scopes else None
+                if scope and scope.get(node.name.lexeme, (0, True))[1] is False:
+                    self.reporter.error(node.name, "Can't read local variable in its own initializer.")
+                self.resolve_local(node, node.name)
+            elif kind is Expr.Assign:
+                work.append(node.value)
+                self.resolve_local(node, node.name)
+            elif kind is Expr.Logical:
+                work.append(node.left)
+                work.append(node.right)
+            elif kind is Expr.Call:
+                work.append(node.callee)
+                work.extend(node.arguments)
+            elif kind is Expr.Unary:
+                work.append(node.right)
+            elif kind is Expr.Grouping:
+                work.append(node.expression)
+            # literals and arenas hold no variables
+
+    def resolve_local(self, node, name: Token):
+        # innermost declaration wins, names no block declares are globals
+        scopes = self.scopes
+        for depth in range(len(scopes)):
+            declared = scopes[-1 - depth].get(name.lexeme)
+            if declared is not None:
+                node.depth = depth
+                node.slot = declared[0]
+                return
+        node.depth = -1
+        node.slot = -1
+
+    def declare(self, name: Token) -> tuple[int, int]:
+        # (depth, slot) of a new variable of the innermost scope
+        if not self.scopes:
+            # globals can be declared again, the new declaration replaces the old one
+            return -1, -1
+        scope = self.scopes[-1]
+        if name.lexeme in scope:
+            self.reporter.error(name, "Already a variable with this name in this scope.")
+            slot = scope[name.lexeme][0]
+        else:
+            # slot 0 of an environment is its enclosing environment
+            slot = len(scope) + 1
+        scope[name.lexeme] = (slot, False)
+        return 0, slot
+
+    def define(self, name: Token):
+        if self.scopes:
+            scope = self.scopes[-1]
+            scope[name.lexeme] = (scope[name.lexeme][0], True)
+
+    def visit_block_stmt(self, stmt: Stmt.Block):
+        # only declarations made directly in the block need its environment, loop bodies often have none
+        if not any(type(statement) is Stmt.Var or type(statement) is Stmt.Function
+                   for statement in stmt.statements):
+            stmt.size = 0
+            self.resolve(stmt.statements)
+            return
+        self.scopes.append({})
+        try:
+            self.resolve(stmt.statements)
+            stmt.size = len(self.scopes[-1])
+        finally:
+            self.scopes.pop()
+
+    def visit_function_stmt(self, stmt: Stmt.Function):
+        # the name is defined before the body is resolved so the function can call itself
+        stmt.depth, stmt.slot = self.declare(stmt.name)
+        self.define(stmt.name)
+
+        if self.functions:
+            # the frame of the enclosing function is captured by this one's closure
+            self.functions[-1].pooled = False
+        stmt.pooled = True
+        self.functions.append(stmt)
+        # parameters and the locals of the body share the environment of the call, parameters come first
+        self.scopes.append({})
+        try:
+            for param in stmt.params:
+                self.declare(param)
+                self.define(param)
+            self.resolve(stmt.body)
+            stmt.size = len(self.scopes[-1])
+        finally:
+            self.scopes.pop()
+            self.functions.pop()
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression):
+        self.resolve_expression(stmt.expression)
+
+    def visit_if_stmt(self, stmt: Stmt.If):
+        self.resolve_expression(stmt.condition)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_print_stmt(self, stmt: Stmt.Print):
+        self.resolve_expression(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Stmt.Return):
+        if not self.functions:
+            self.reporter.error(stmt.keyword, "Can't return from top-level code.")
+        if stmt.value is not None:
+            self.resolve_expression(stmt.value)
+
+    def visit_var_stmt(self, stmt: Stmt.Var):
+        stmt.depth, stmt.slot = self.declare(stmt.name)
+        if stmt.initializer is not None:
+            self.resolve_expression(stmt.initializer)
+        self.define(stmt.name)
+
+    def visit_while_stmt(self, stmt: Stmt.While):
+        self.resolve_expression(stmt.condition)
+        stmt.body.accept(self)
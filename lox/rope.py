@@ -0,0 +1,73 @@
+"""
+Lazy strings for chains of "+".
+Concatenating two python strings copies both, so building a string with n "+" on a left associative tree
+copies O(n²) characters. Long concatenations make a Rope instead: a node holding its two operands, which is
+only joined into a str, once, when its text is needed (printing it, comparing it to another string).
+A Rope stands for a lox string wherever a str does: the engines accept either as a string operand.
+"""
+
+# concatenations shorter than this are done right away, copying a short string is cheaper than a node
+MIN_ROPE_LENGTH = 256
+
+
+class Rope:
+    """
+    The concatenation of left and right, each a str or a Rope, not joined yet.
+    Once joined, left holds the text and right is None, so later uses of this rope (and of ropes built on it)
+    don't join it again.
+    """
+    __slots__ = ('left', 'right', 'length')
+
+    def __init__(self, left, right, length: int):
+        self.left = left
+        self.right = right
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        if self.right is not None:
+            # an explicit stack, a chain of "+" makes a rope as deep as the chain is long
+            parts = []
+            stack = [self.right, self.left]
+            while stack:
+                node = stack.pop()
+                if type(node) is str:
+                    parts.append(node)
+                elif node.right is None:
+                    parts.append(node.left)
+                else:
+                    stack.append(node.right)
+                    stack.append(node.left)
+            self.left = "".join(parts)
+            self.right = None
+        return self.left
+
+    def __eq__(self, other):
+        if type(other) is Rope or type(other) is str:
+            return self.length == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __reduce__(self):
+        # copies and pickles (results sent back from worker processes) are plain strings
+        return str, (str(self),)
+
+
+# types of the values that are lox strings
+STRING_TYPES = (str, Rope)
+
+
+def concat(left, right):
+    # left + right for two lox strings
+    length = len(left) + len(right)
+    if length < MIN_ROPE_LENGTH:
+        # a rope is never this short, so both are str
+        return left + right
+    return Rope(left, right, length)
@@ -0,0 +1,119 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import traceback
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from collections.abc import Iterable
+from .session import Session, SCANNERS, ENGINES
+
+# exit status of a path that doesn't exist or can't be read (EX_NOINPUT)
+NO_INPUT = 66
+
+
+class FileResult:
+    """
+    Outcome of running one script: its exit status (same meaning as Session.run_file), what it printed and how
+    long it took.
+    """
+    __slots__ = ('path', 'status', 'stdout', 'stderr', 'seconds')
+
+    def __init__(self, path: str, status: int, stdout: str, stderr: str, seconds: float):
+        self.path = path
+        self.status = status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def expand_paths(patterns: Iterable[str]) -> list[str]:
+    # files are kept as given, directories contribute every .lox file below them and anything else is a glob
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, '**', '*.lox'), recursive=True)))
+        elif os.path.exists(pattern):
+            paths.append(pattern)
+        else:
+            # a pattern matching nothing is kept, so it shows up as a missing file
+            paths.extend(sorted(glob.glob(pattern, recursive=True)) or [pattern])
+    return paths
+
+
+def run_one(path: str, scanner: str = "default", engine: str = "tree", optimize: bool = False,
+            print_ast: bool = False, check: bool = False) -> FileResult:
+    # runs a single script with its output captured, this is what the worker processes execute
+    # with check=True the script is only checked, every error it has is printed and nothing is run
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start = time.perf_counter()
+    session = Session(stdout, stderr)
+    try:
+        with open(path) as file:
+            source = file.read()
+    except OSError as error:
+        print(f"Can't read {path}: {error.strerror}", file=stderr)
+        status = NO_INPUT
+    else:
+        try:
+            if check:
+                from .diagnostics import check as check_source
+                diagnostics = check_source(source)
+                for diagnostic in diagnostics:
+                    print(f"{path}:{diagnostic}", file=stderr)
+                status = 65 if diagnostics else 0
+            else:
+                session.run(source, scanner, engine=engine, optimize=optimize, print_ast=print_ast)
+                status = session.exit_status()
+        except Exception:
+            # a crash of the interpreter itself, report it like python would for a single script
+            traceback.print_exc(file=stderr)
+            status = 1
+    return FileResult(path, status, stdout.getvalue(), stderr.getvalue(), time.perf_counter() - start)
+
+
+def run_many(paths: list[str], workers: int | None = None, chunksize: int = 1, **options) -> list[FileResult]:
+    """
+    Runs every script in a pool of worker processes (workers=None uses one per cpu, workers=1 runs them in
+    this process). Results come back in the order of paths, whatever order the workers finish in.
+    """
+    task = partial(run_one, **options)
+    if workers == 1:
+        return [task(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(task, paths, chunksize=chunksize))
+
+
+def main(args: list[str]) -> int:
+    arg_parser = ArgumentParser(prog="main.py --many", description="Run many lox scripts in parallel.")
+    arg_parser.add_argument('paths', nargs='+', help="scripts, directories (searched for .lox files) or globs")
+    arg_parser.add_argument('-j', '--workers', type=int, default=None, help="number of worker processes")
+    arg_parser.add_argument('--chunksize', type=int, default=1, help="scripts handed to a worker at a time")
+    arg_parser.add_argument('--scanner', default="default", choices=sorted(SCANNERS))
+    arg_parser.add_argument('--engine', default="tree", choices=sorted(ENGINES))
+    arg_parser.add_argument('--optimize', action='store_true')
+    arg_parser.add_argument('--print-ast', action='store_true', help="print the tree of every script")
+    arg_parser.add_argument('--check', action='store_true', help="report the errors of every script, don't run it")
+    arg_parser.add_argument('--json', action='store_true', help="print the results as json")
+    options = arg_parser.parse_args(args)
+
+    results = run_many(expand_paths(options.paths), options.workers, options.chunksize,
+                       scanner=options.scanner, engine=options.engine, optimize=options.optimize,
+                       print_ast=options.print_ast, check=options.check)
+
+    if options.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        for result in results:
+            print(f"==> {result.path} (exit {result.status}, {result.seconds * 1000:.2f} ms)")
+            sys.stdout.write(result.stdout)
+            sys.stderr.write(result.stderr)
+
+    # the worst status wins, so any failing script fails the whole run
+    return max((result.status for result in results), default=0)
@@ -1,14 +1,20 @@
-from token_type import TokenType
-from tokens import Token, KEYWORDS
-from typing import List, Optional, Any
+from .token_type import TokenType
+from .tokens import Token, KEYWORDS, FIXED_LEXEMES, NO_LITERAL
+from .errors import ErrorReporter
 
 
 
 class Scanner:
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, reporter: ErrorReporter | None = None):
+        # errors are sent to the reporter of the run this scanner belongs to
+        self.reporter = reporter or ErrorReporter()
+        self.reset(source)
+
+    def reset(self, source: str):
+        # start over on a new source, lets one scanner be reused for many sources
         self.source = source
-        self.tokens: List[Token] = []
+        self.tokens: list[Token] = []
         # scans the first character in the lexeme being scanned
         self.start = 0
         # points at the character that is currently being considered
@@ -36,10 +42,13 @@ class Scanner:
         self.current += 1
         return True
 
-    def add_token(self, type: TokenType, literal: Optional[Any] = None) -> None:
+    def add_token(self, type: TokenType, literal: object = None) -> None:
         if literal is None:
-            literal = "null"
-        text = self.source[self.start: self.current]
+            literal = NO_LITERAL
+        # fixed lexemes are shared, only numbers, strings and identifiers need a slice of the source
+        text = FIXED_LEXEMES.get(type)
+        if text is None:
+            text = self.source[self.start: self.current]
         self.tokens.append(Token(type, text, literal, self.line))
 
     def peek(self):
@@ -54,7 +63,6 @@ class Scanner:
         return self.source[self.current + 1]
 
     def string(self):
-        from lox import Lox
         # for reading string literals
         # string starts with '"', so now we look for the end of string by finding '"'
         while self.peek() != '"' and not self.is_at_end():
@@ -64,7 +72,7 @@ class Scanner:
             self.advance()
         # checking if we are at the end of string before finding the closing string "
         if self.is_at_end():
-            Lox.scanner_error(self.line, "Unterminated string.")
+            self.reporter.scanner_error(self.line, "Unterminated string.", self.start)
             return
         # if we arent at the end of string, we found the closing string as we are out of the loop
         self.advance()
@@ -109,7 +117,6 @@ class Scanner:
         self.add_token(type)
 
     def scan_token(self):
-        from lox import Lox
         char = self.advance()
 
         match char:
@@ -178,7 +185,7 @@ class Scanner:
                 elif self.is_alpha(char):
                     self.identifier()
                 else:
-                    Lox.error(self.line, f"Unexpected character: {char}")
+                    self.reporter.scanner_error(self.line, f"Unexpected character: {char}", self.start)
 
     def scan_tokens(self):
         # go through the source and scan tokens
@@ -186,4 +193,15 @@ class Scanner:
             self.start = self.current
             self.scan_token()
         # at the end add EOF token
-        self.tokens.append(Token(TokenType.EOF, "", "null", self.line))
+        self.tokens.append(Token(TokenType.EOF, "", NO_LITERAL, self.line))
+
+    def iter_tokens(self):
+        # lazy version of scan_tokens, tokens are yielded as soon as they are scanned
+        # self.tokens is used as a small scratch buffer (scan_token adds at most one token), so it never
+        # holds more than a single token and is empty once the generator is exhausted
+        while not self.is_at_end():
+            self.start = self.current
+            self.scan_token()
+            if self.tokens:
+                yield self.tokens.pop()
+        yield Token(TokenType.EOF, "", NO_LITERAL, self.line)
@@ -0,0 +1,177 @@
+"""
+Long running lox server: the interpreter is imported and its caches warmed once, then every request only pays for
+running its source.
+
+    python main.py --serve                 listens on a unix socket (client.DEFAULT_SOCKET or --socket PATH)
+    python client.py script.lox            runs a script on it
+    python main.py --serve --stdio         reads requests from stdin and writes responses to stdout
+
+The protocol is json lines, one request per line and one response line per request, in order:
+
+    {"id": 1, "source": "1 + 2"}                       or {"file": "/abs/path/script.lox"}
+    {"id": 1, "status": 0, "stdout": "3\\n", "stderr": "", "seconds": 0.0001}
+
+A request may also set "scanner", "parser", "engine", "optimize" and "print_ast" like Session.run. status is the
+exit status the script would have had when run by main.py. Every request runs in its own Session, with the shared
+in-memory parse cache enabled, so repeated sources and unchanged files are not parsed again. Files are read by the
+server but the on-disk cache is never used for them, the server doesn't write into the directories of clients.
+"""
+import io
+import os
+import sys
+import json
+import time
+import stat
+import signal
+import socket
+import traceback
+import socketserver
+from argparse import ArgumentParser
+from typing import TextIO
+from .session import Session, SCANNERS, PARSERS, ENGINES
+from .runner import NO_INPUT
+from .client import DEFAULT_SOCKET, UNAVAILABLE
+
+# exit status of a request that can't be understood (EX_USAGE, like a bad command line)
+BAD_REQUEST = 64
+
+
+def handle(message) -> dict:
+    # runs one request and returns its response
+    start = time.perf_counter()
+    stdout, stderr = io.StringIO(), io.StringIO()
+    if not isinstance(message, dict):
+        message = {}
+    scanner = message.get("scanner", "default")
+    parser = message.get("parser", "recursive")
+    engine = message.get("engine", "tree")
+
+    if ("source" in message) == ("file" in message):
+        print('Bad request: expected a json object with either "source" or "file"', file=stderr)
+        status = BAD_REQUEST
+    elif not all(type(message.get(key, "")) is str for key in ("source", "file", "scanner", "parser", "engine")):
+        print('Bad request: "source", "file", "scanner", "parser" and "engine" must be strings', file=stderr)
+        status = BAD_REQUEST
+    elif scanner not in SCANNERS or parser not in PARSERS or engine not in ENGINES:
+        print("Bad request: unknown scanner, parser or engine", file=stderr)
+        status = BAD_REQUEST
+    else:
+        session = Session(stdout, stderr)
+        optimize = bool(message.get("optimize", False))
+        print_ast = bool(message.get("print_ast", False))
+        try:
+            if "file" in message:
+                with open(message["file"]) as file:
+                    source = file.read()
+            else:
+                source = message["source"]
+            # the in-memory cache is keyed by the contents, an unchanged file is a hit
+            session.run(source, scanner, engine=engine, optimize=optimize, cache=True, parser=parser,
+                        print_ast=print_ast)
+            status = session.exit_status()
+        except OSError as error:
+            print(f"Can't read {message['file']}: {error.strerror}", file=stderr)
+            status = NO_INPUT
+        except Exception:
+            # a crash of the interpreter itself, reported like python would for a single script
+            traceback.print_exc(file=stderr)
+            status = 1
+
+    return {
+        "id": message.get("id"),
+        "status": status,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def serve_lines(requests: TextIO, responses: TextIO):
+    # answers every request line until the input ends
+    for line in requests:
+        if not line.strip(): continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            # answered as a bad request
+            message = None
+        response = handle(message)
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    # one connection, which may send any number of requests
+    def handle(self):
+        requests = io.TextIOWrapper(self.rfile, encoding='utf-8')
+        responses = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+        try:
+            serve_lines(requests, responses)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            requests.detach()
+            responses.detach()
+
+
+def remove_stale_socket(path: str):
+    # a socket file left behind by a server that didn't shut down cleanly is removed, nobody answers on it
+    # the socket of a running server and files that aren't sockets are left alone, binding to them then fails
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode): return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server answering every connection in its own thread, sessions don't share any state."""
+    daemon_threads = True
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        remove_stale_socket(path)
+        # only set once bound, a failed bind closes the server and must not remove what is at path
+        self.path = None
+        super().__init__(path, RequestHandler)
+        self.path = path
+
+    def server_close(self):
+        super().server_close()
+        if self.path is None: return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def main(args: list[str]) -> int:
+    arg_parser = ArgumentParser(prog="main.py --serve", description="Run lox scripts sent by clients.")
+    arg_parser.add_argument('--socket', default=DEFAULT_SOCKET, help="unix socket to listen on")
+    arg_parser.add_argument('--stdio', action='store_true', help="serve requests from stdin instead of a socket")
+    options = arg_parser.parse_args(args)
+
+    if options.stdio:
+        serve_lines(sys.stdin, sys.stdout)
+        return 0
+
+    # a plain kill stops the server like ctrl-c does, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server = Server(options.socket)
+    except OSError as error:
+        # another server is listening there, or the path is taken by something that isn't a socket
+        print(f"Can't listen on {options.socket}: {error.strerror}", file=sys.stderr)
+        return UNAVAILABLE
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return 0
@@ -0,0 +1,282 @@
+from time import perf_counter
+from collections.abc import Mapping
+from io import TextIOBase
+from .errors import ErrorReporter
+from .runtime_error import LoxRuntimeError
+
+
+def load(path: str):
+    # "module.name" inside this package -> the object
+    # same as "from .module import name", importlib.import_module would cost an import of its own
+    module, _, name = path.rpartition('.')
+    return getattr(__import__(module, globals(), None, [name], 1), name)
+
+
+class Registry(Mapping):
+    """
+    Read only name -> class mapping whose classes are imported the first time they are looked up,
+    so a run only pays for importing the scanner, parser and engine it actually uses.
+    """
+
+    def __init__(self, paths: dict[str, str]):
+        self.paths = paths
+        self.loaded = {}
+
+    def __getitem__(self, name: str):
+        value = self.loaded.get(name)
+        if value is None:
+            value = self.loaded[name] = load(self.paths[name])
+        return value
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+class Shared:
+    """
+    Class attribute holding one object shared by every session, made on first access and then stored in
+    place of this descriptor. Two threads racing on the first access at worst build one spare object.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance, owner):
+        value = load(self.path)()
+        setattr(self.owner, self.name, value)
+        return value
+
+
+# scanning engines selectable through Session.run(source, scanner=...)
+SCANNERS = Registry({
+    "default": "scanner.Scanner",
+    "regex": "regex_scanner.RegexScanner",
+    "bytes": "bytes_scanner.BytesScanner",
+})
+
+# parsers selectable through Session.run(source, parser=...), and the variants used with stream=True
+# the iterative one has no recursion limit on how deeply expressions nest, the arena one is iterative too and
+# stores the tree in flat arrays (see arena.Arena)
+PARSERS = Registry({
+    "recursive": "parser.Parser",
+    "iterative": "iterative_parser.IterativeParser",
+    "arena": "arena.ArenaParser",
+})
+STREAM_PARSERS = Registry({
+    "recursive": "parser.StreamParser",
+    "iterative": "iterative_parser.IterativeStreamParser",
+    "arena": "arena.ArenaStreamParser",
+})
+
+# execution engines selectable through Session.run(source, engine=...)
+ENGINES = Registry({
+    "tree": "interpreter.Interpreter",
+    "closure": "closure_compiler.ClosureInterpreter",
+    "vm": "vm.VM",
+    "iterative": "iterative_interpreter.IterativeInterpreter",
+})
+
+
+class Engines(dict):
+    # the engines of one session by name, each one made the first time it is used
+    def __init__(self, session: 'Session'):
+        super().__init__()
+        self.session = session
+
+    def __missing__(self, name: str):
+        engine = self[name] = ENGINES[name](self.session)
+        return engine
+
+
+class Session(ErrorReporter):
+    """
+    One independent lox run: its own error flags, output streams and interpreters.
+    The scanner, parser and interpreter of a run all report to their session, nothing is kept in globals,
+    so many sessions can run at the same time in threads or asyncio tasks.
+    The parse caches and the optimizer hold no per run state and are shared by every session.
+    Everything but the core of a plain run (scanner, parser, tree walker) is imported when first needed.
+    """
+    parse_cache = Shared("parse_cache.ParseCache")
+    disk_cache = Shared("parse_cache.DiskCache")
+    optimizer = Shared("optimizer.Optimizer")
+
+    def __init__(self, stdout: TextIOBase | None = None, stderr: TextIOBase | None = None,
+                 sink: list[tuple[int, str, str]] | None = None):
+        super().__init__(stdout, stderr, sink)
+        self.engines = Engines(self)
+
+    @property
+    def interpreter(self):
+        return self.engines["tree"]
+
+    def run_file(self, filename, scanner="default", stream=False, engine="tree", optimize=False, cache=False,
+                 stats=None, parser="recursive", mmap=False, print_ast=False, max_depth=None):
+        # runs a script and returns its exit status
+        # with cache=True the AST is looked up in (and saved to) the per user on-disk cache (see DiskCache)
+        # with mmap=True the file is memory mapped instead of read and scanned as bytes, whatever the scanner
+        if mmap:
+            from .bytes_scanner import map_file
+            with open(filename, 'rb') as file, map_file(file) as buffer:
+                return self.run_contents(filename, buffer, "bytes", stream, engine, optimize, cache, stats, parser,
+                                         print_ast, max_depth)
+        return self.run_contents(filename, None, scanner, stream, engine, optimize, cache, stats, parser, print_ast,
+                                 max_depth)
+
+    def run_contents(self, filename, file_contents, scanner, stream, engine, optimize, cache, stats, parser,
+                     print_ast, max_depth):
+        # file_contents is the source of filename, or None when it still has to be read
+        start = perf_counter()
+        expression = None
+        if cache:
+            expression, file_contents = self.disk_cache.lookup(filename, optimize, file_contents, scanner, parser)
+
+        if expression is not None:
+            # trees are stored resolved, globals are looked up by name so they run as they are
+            if stats is not None:
+                stats.add_phase("cache", perf_counter() - start)
+                stats.add_tree(expression)
+            self.execute(expression, engine, stats, print_ast)
+        else:
+            if file_contents is None:
+                with open(filename) as file:
+                    file_contents = file.read()
+            if stats is not None:
+                stats.add_phase("read", perf_counter() - start)
+
+            expression = self.run(file_contents, scanner, stream, engine, optimize, cache, stats, parser, print_ast,
+                                  max_depth)
+            if cache and expression is not None:
+                self.disk_cache.store(filename, file_contents, expression, optimize, scanner, parser)
+
+        return self.exit_status()
+
+    def parse(self, source, scanner="default", stream=False, optimize=False, stats=None, parser="recursive",
+              max_depth=None):
+        # scans and parses the source, returns None if there was a syntax error
+        # timing is always taken, it is only a couple of clock reads; counting only happens with stats
+        # max_depth limits the nesting the iterative and arena parsers accept, see IterativeParser
+        if max_depth is None:
+            options = {}
+        elif parser == "recursive":
+            raise ValueError("max_depth needs the iterative or arena parser")
+        else:
+            options = {"max_depth": max_depth}
+        start = perf_counter()
+        scanner = SCANNERS[scanner](source, self)
+        if stream:
+            # tokens are scanned on demand while parsing, the full token list is never built
+            # scanning time is then part of the parse phase
+            tokens = scanner.iter_tokens()
+            if stats is not None:
+                tokens = stats.count_tokens(tokens)
+            parser = STREAM_PARSERS[parser](tokens, self, **options)
+        else:
+            scanner.scan_tokens()
+            # for token in scanner.tokens:
+            #     print(token)
+            if stats is not None:
+                stats.add_phase("scan", perf_counter() - start)
+                stats.tokens += len(scanner.tokens)
+                start = perf_counter()
+            parser = PARSERS[parser](scanner.tokens, self, **options)
+        expression = parser.parse()
+        if stats is not None:
+            stats.add_phase("parse", perf_counter() - start)
+
+        # stop if there is syntax error
+        if self.had_error: return None
+
+        if parser.names:
+            start = perf_counter()
+            self.resolve(expression)
+            if stats is not None:
+                stats.add_phase("resolve", perf_counter() - start)
+            if self.had_error: return None
+
+        if stats is not None:
+            stats.add_tree(expression)
+
+        if optimize:
+            start = perf_counter()
+            expression = self.optimizer.optimize(expression)
+            if stats is not None:
+                stats.add_phase("optimize", perf_counter() - start)
+        return expression
+
+    def resolve(self, tree):
+        # gives every variable of the tree its slot, errors are reported like syntax errors
+        from .resolver import Resolver
+        Resolver(self).resolve(tree)
+
+    def execute(self, expression, engine="tree", stats=None, print_ast=False):
+        # with print_ast=True the tree is printed after it was evaluated
+        interpreter = self.engines[engine]
+        if stats is not None:
+            # the session's own engine counts its visits for this run only, so globals of earlier runs are kept
+            # compiling engines only visit the tree while compiling it, count those visits
+            visitor = getattr(interpreter, 'compiler', interpreter)
+            stats.count_visits(visitor)
+
+        start = perf_counter()
+        try:
+            interpreter.interpret(expression)
+        except RecursionError:
+            # only the iterative engine runs trees of any depth, the others recurse on the python stack
+            self.runtime_error(LoxRuntimeError(None, f"Stack overflow: the tree nests too deeply for the {engine} "
+                                                     f"engine, run it with engine=\"iterative\"."))
+        finally:
+            if stats is not None:
+                stats.uncount_visits(visitor)
+        if stats is not None:
+            stats.add_phase("evaluate", perf_counter() - start)
+
+        if print_ast:
+            start = perf_counter()
+            from .ast_printer import AstPrinter
+            self.print(AstPrinter().print(expression))
+            if stats is not None:
+                stats.add_phase("print_ast", perf_counter() - start)
+
+    def run(self, source, scanner="default", stream=False, engine="tree", optimize=False, cache=False,
+            stats=None, parser="recursive", print_ast=False, max_depth=None):
+        # returns the AST that was executed, None if there wasn't one
+        # with cache=True repeated sources reuse the AST from the parse cache instead of being parsed again
+        # pass a Stats object to have the run instrumented
+        if stats is not None:
+            errors, runtime_errors = self.error_count, self.runtime_error_count
+        try:
+            return self.run_source(source, scanner, stream, engine, optimize, cache, stats, parser, print_ast,
+                                   max_depth)
+        finally:
+            if stats is not None:
+                stats.syntax_errors += self.error_count - errors
+                stats.runtime_errors += self.runtime_error_count - runtime_errors
+
+    def run_source(self, source, scanner, stream, engine, optimize, cache, stats, parser, print_ast, max_depth):
+        if source:
+            expression = None
+            if cache:
+                from .parse_cache import source_key
+                key = source_key(source, optimize, scanner, parser)
+                expression = self.parse_cache.get(key)
+
+            if expression is None:
+                expression = self.parse(source, scanner, stream, optimize, stats, parser, max_depth)
+                if expression is None: return None
+                if cache:
+                    self.parse_cache.put(key, expression)
+            elif stats is not None:
+                stats.add_tree(expression)
+
+            self.execute(expression, engine, stats, print_ast)
+            return expression
+        else:
+            self.print("EOF  null")
+            return None
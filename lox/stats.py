@@ -0,0 +1,126 @@
+import json
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+from . import Expr, Stmt
+from .arena import Arena
+
+
+def tree_shape(tree) -> tuple[int, int]:
+    # (number of nodes, depth) of an AST or a program, walked with an explicit stack so deep trees can't
+    # overflow. The statements of a program are the top level nodes.
+    if isinstance(tree, Arena):
+        return tree.shape()
+    nodes = 0
+    depth = 0
+    stack = [(node, 1) for node in tree] if type(tree) is list else [(tree, 1)]
+    while stack:
+        node, level = stack.pop()
+        nodes += 1
+        if level > depth:
+            depth = level
+        for name in node.__slots__:
+            child = getattr(node, name)
+            if isinstance(child, (Expr.Expr, Stmt.Stmt)):
+                stack.append((child, level + 1))
+            elif type(child) is list:
+                # statements, arguments, or the parameter tokens of a function which aren't nodes
+                stack.extend((item, level + 1) for item in child if isinstance(item, (Expr.Expr, Stmt.Stmt)))
+    return nodes, depth
+
+
+def count_tokens(tokens: Iterable, stats: 'Stats') -> Iterator:
+    # passes a token stream through, counting it
+    for token in tokens:
+        stats.tokens += 1
+        yield token
+
+
+def count_visits(visitor: Expr.ExprVisitor, visits: Counter):
+    """
+    Makes visitor count its visit_* calls by node type into visits.
+    The counting wrappers are set on the instance only, so the class (and every other instance) keeps
+    running the plain methods and pays nothing for it.
+    A visitor with a visits attribute (IterativeInterpreter) evaluates some nodes without visiting them and
+    counts those itself.
+    """
+    if hasattr(visitor, 'visits'):
+        visitor.visits = visits
+    for name in dir(type(visitor)):
+        if name.startswith('visit_'):
+            method = getattr(visitor, name)
+            # visit_binary_expr -> Binary, visit_print_stmt -> Print
+            node_type = name[len('visit_'):].rpartition('_')[0].capitalize()
+
+            def counted(expr, method=method, node_type=node_type):
+                visits[node_type] += 1
+                return method(expr)
+            setattr(visitor, name, counted)
+
+
+def uncount_visits(visitor: Expr.ExprVisitor):
+    # undoes count_visits, the instance runs the plain methods of its class again
+    for name in [name for name in vars(visitor) if name.startswith('visit_') or name == 'visits']:
+        delattr(visitor, name)
+
+
+class Stats:
+    """
+    Instrumentation of one run: wall time of every phase, token and AST node counts, tree depth,
+    visit_* calls by node type and error counts.
+    Only collected when a Stats object is passed to Session.run/run_file, without one nothing is counted.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.tokens = 0
+        self.nodes = 0
+        self.depth = 0
+        self.visits: Counter = Counter()
+        self.syntax_errors = 0
+        self.runtime_errors = 0
+
+    def add_phase(self, name: str, seconds: float):
+        # phases can run more than once, e.g. on every REPL line
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_tree(self, tree):
+        self.nodes, self.depth = tree_shape(tree)
+
+    def count_tokens(self, tokens: Iterable) -> Iterator:
+        return count_tokens(tokens, self)
+
+    def count_visits(self, visitor: Expr.ExprVisitor):
+        count_visits(visitor, self.visits)
+
+    def uncount_visits(self, visitor: Expr.ExprVisitor):
+        uncount_visits(visitor)
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": self.phases,
+            "total_seconds": sum(self.phases.values()),
+            "tokens": self.tokens,
+            "nodes": self.nodes,
+            "depth": self.depth,
+            "visits": dict(self.visits),
+            "syntax_errors": self.syntax_errors,
+            "runtime_errors": self.runtime_errors,
+        }
+
+    def summary(self) -> str:
+        lines = ["--- lox stats ---"]
+        for name, seconds in self.phases.items():
+            lines.append(f"{name + ':':<12} {seconds * 1000:10.3f} ms")
+        lines.append(f"{'total:':<12} {sum(self.phases.values()) * 1000:10.3f} ms")
+        lines.append(f"tokens: {self.tokens}  nodes: {self.nodes}  depth: {self.depth}")
+        if self.visits:
+            lines.append("visits: " + ", ".join(f"{name} {count}" for name, count in sorted(self.visits.items())))
+        lines.append(f"syntax errors: {self.syntax_errors}  runtime errors: {self.runtime_errors}")
+        return "\n".join(lines)
+
+    def emit(self, stream: TextIO, format: str = "text"):
+        if format == "json":
+            print(json.dumps(self.to_dict()), file=stream)
+        else:
+            print(self.summary(), file=stream)
@@ -1,19 +1,47 @@
-from token_type import TokenType
-from typing import Any, Tuple, Dict
+import sys
+from .token_type import TokenType
 
-_keywords: Tuple[str] = (
+_keywords: tuple[str, ...] = (
     'and', 'class', 'else', 'false', 'for', 'fun', 'if', 'nil',
     'or', 'print', 'super', 'this', 'true', 'var', 'while', 'return'
 )
 
-KEYWORDS: Dict[str, TokenType] = {key: TokenType(key) for key in _keywords}
+KEYWORDS: dict[str, TokenType] = {key: TokenType(key) for key in _keywords}
+
+# keywords, operators and punctuation always have the same lexeme, so every token of one of these types
+# shares a single interned string instead of carrying its own slice of the source
+FIXED_LEXEMES: dict[TokenType, str] = {
+    token_type: sys.intern(token_type.value) for token_type in TokenType
+    if token_type not in (TokenType.STRING, TokenType.NUMBER, TokenType.IDENTIFIER)
+}
+
+
+class NoLiteral:
+    """
+    Type of the NO_LITERAL sentinel, the literal of every token that isn't a string or a number.
+    It prints as "null" like the string that used to be stored there.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return "null"
+
+    def __reduce__(self):
+        # keep the sentinel a singleton when tokens are copied or pickled
+        return "NO_LITERAL"
+
+
+NO_LITERAL = NoLiteral()
 
 
 class Token:
+    # no per instance __dict__, tokens are by far the most numerous objects we create
+    __slots__ = ('type', 'lexeme', 'literal', 'line')
+
     def __init__(self,
                  type: TokenType,
                  lexeme: str,
-                 literal: Any,
+                 literal: object,
                  line: int
                  ):
         self.type = type
@@ -0,0 +1,150 @@
+from . import Expr
+from .bytecode import (Chunk, Compiler, OP_CONSTANT, OP_ADD, OP_SUBTRACT, OP_MULTIPLY, OP_DIVIDE, OP_GREATER,
+                      OP_GREATER_EQUAL, OP_LESS, OP_LESS_EQUAL, OP_EQUAL, OP_NOT_EQUAL, OP_NEGATE, OP_NOT, OP_POP,
+                      OP_NIL, OP_RETURN, OP_GET_VARIABLE, OP_SET_VARIABLE, OP_CALL, OP_JUMP_IF_FALSE_OR_POP,
+                      OP_JUMP_IF_TRUE_OR_POP)
+from .runtime_error import LoxRuntimeError
+from .interpreter import Interpreter
+from .rope import Rope, STRING_TYPES, concat
+
+
+class VM(Interpreter):
+    """
+    Stack based virtual machine. Expressions are compiled to a bytecode Chunk and executed by a single
+    dispatch loop, the results (and runtime errors) are the same as the tree walking Interpreter.
+    Statements are run by Interpreter, the expressions in them by the vm. While a program runs every expression
+    is compiled only once, loops and function bodies run the cached chunk again.
+    """
+
+    def __init__(self, reporter=None):
+        super().__init__(reporter)
+        self.compiler = Compiler()
+        # node -> its chunk while a program runs, None otherwise
+        self.chunks = None
+
+    def compile(self, expr: Expr.Expr) -> Chunk:
+        return self.compiler.compile(expr)
+
+    def evaluate(self, expr: Expr.Expr):
+        chunks = self.chunks
+        if chunks is None:
+            return self.run(self.compiler.compile(expr))
+        chunk = chunks.get(expr)
+        if chunk is None:
+            chunk = chunks[expr] = self.compiler.compile(expr)
+        return self.run(chunk)
+
+    def execute_program(self, statements):
+        # the cache lives as long as the program, so it never outgrows the tree being run
+        self.chunks = {}
+        try:
+            super().execute_program(statements)
+        finally:
+            self.chunks = None
+
+    @staticmethod
+    def error(chunk: Chunk, offset: int, message: str) -> LoxRuntimeError:
+        return LoxRuntimeError(chunk.tokens[offset], message)
+
+    def run(self, chunk: Chunk):
+        # everything the loop touches is a local, attribute and global lookups are much slower
+        code = chunk.code
+        constants = chunk.constants
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        look_up = self.look_up
+        assign = self.assign
+        call = self.call
+        ip = 0
+
+        while True:
+            op = code[ip]
+            ip += 1
+            # ordered roughly by how often the instructions show up
+            if op == OP_CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == OP_GET_VARIABLE:
+                push(look_up(constants[code[ip]]))
+                ip += 1
+            elif op == OP_SET_VARIABLE:
+                # assignment is an expression, its value stays on the stack
+                stack[-1] = assign(constants[code[ip]], stack[-1])
+                ip += 1
+            elif op == OP_CALL:
+                count = code[ip]
+                ip += 1
+                if count:
+                    arguments = stack[-count:]
+                    del stack[-count:]
+                else:
+                    arguments = []
+                stack[-1] = call(stack[-1], chunk.tokens[ip - 2], arguments)
+            elif op == OP_JUMP_IF_FALSE_OR_POP:
+                a = stack[-1]
+                if a is None or a is False:
+                    ip = code[ip]
+                else:
+                    pop()
+                    ip += 1
+            elif op == OP_JUMP_IF_TRUE_OR_POP:
+                a = stack[-1]
+                if a is None or a is False:
+                    pop()
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == OP_ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) == float and type(b) == float:
+                    stack[-1] = a + b
+                elif type(a) in STRING_TYPES and type(b) in STRING_TYPES:
+                    stack[-1] = concat(a, b)
+                else:
+                    raise self.error(chunk, ip - 1, "Operands must be two numbers or two strings.")
+            elif op <= OP_LESS_EQUAL:
+                # the remaining arithmetic and comparison operators all need two numbers
+                b = pop()
+                a = stack[-1]
+                if type(a) != float or type(b) != float:
+                    raise self.error(chunk, ip - 1, "Operands must be numbers.")
+                if op == OP_SUBTRACT:
+                    stack[-1] = a - b
+                elif op == OP_MULTIPLY:
+                    stack[-1] = a * b
+                elif op == OP_DIVIDE:
+                    if not b:
+                        raise self.error(chunk, ip - 1, "Division by zero.")
+                    stack[-1] = a / b
+                elif op == OP_GREATER:
+                    stack[-1] = a > b
+                elif op == OP_GREATER_EQUAL:
+                    stack[-1] = a >= b
+                elif op == OP_LESS:
+                    stack[-1] = a < b
+                else:
+                    stack[-1] = a <= b
+            elif op == OP_EQUAL:
+                b = pop()
+                a = stack[-1]
+                stack[-1] = a is b or (type(a) == type(b) or type(a) is Rope or type(b) is Rope) and a == b
+            elif op == OP_NOT_EQUAL:
+                b = pop()
+                a = stack[-1]
+                stack[-1] = not (a is b or (type(a) == type(b) or type(a) is Rope or type(b) is Rope) and a == b)
+            elif op == OP_NEGATE:
+                a = stack[-1]
+                if type(a) != float:
+                    raise self.error(chunk, ip - 1, "Operand must be a number.")
+                stack[-1] = -a
+            elif op == OP_NOT:
+                a = stack[-1]
+                stack[-1] = a is None or a is False
+            elif op == OP_RETURN:
+                return pop()
+            elif op == OP_POP:
+                pop()
+            elif op == OP_NIL:
+                push(None)
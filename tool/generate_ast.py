@@ -1,6 +1,6 @@
 from argparse import ArgumentParser
 import os
-from typing import TextIO, Dict
+from typing import TextIO
 
 # for taking arguments from command line
 arg_parser = ArgumentParser()
@@ -13,23 +13,42 @@ args = arg_parser.parse_args()
 INDENT = " " * 4  # 4 spaces for indentation
 
 # Expressions
-EXPRESSIONS: Dict = {
+# depth, slot, size and pooled are not parsed, they are filled in by the resolver (see lox/resolver.py)
+EXPRESSIONS: dict = {
     "Binary": ("left: Expr", 'operator: Token', "right: Expr"),
     "Grouping": ("expression: Expr",),
-    "Literal": ("value: Any",),
-    "Unary": ("operator: Token", "right: Expr")
+    "Literal": ("value: object",),
+    "Unary": ("operator: Token", "right: Expr"),
+    "Assign": ("name: Token", "value: Expr", "depth: int = -1", "slot: int = -1"),
+    "Variable": ("name: Token", "depth: int = -1", "slot: int = -1"),
+    "Call": ("callee: Expr", "paren: Token", "arguments: list[Expr]"),
+    "Logical": ("left: Expr", "operator: Token", "right: Expr"),
+}
+
+# Statements
+STATEMENTS: dict = {
+    "Block": ("statements: list[Stmt]", "size: int = 0"),
+    "Expression": ("expression: Expr",),
+    "Print": ("expression: Expr",),
+    "Var": ("name: Token", "initializer: Expr | None", "depth: int = -1", "slot: int = -1"),
+    "Function": ("name: Token", "params: list[Token]", "body: list[Stmt]", "depth: int = -1", "slot: int = -1",
+                 "size: int = 0", "pooled: bool = False"),
+    "If": ("condition: Expr", "then_branch: Stmt", "else_branch: Stmt | None"),
+    "Return": ("keyword: Token", "value: Expr | None"),
+    "While": ("condition: Expr", "body: Stmt"),
 }
 
 
-def define_ast(output_dir, base_name: str, types: Dict):
+def define_ast(output_dir, base_name: str, types: dict, imports: tuple = ()):
     # define the path to the output file
     path = os.path.join(output_dir, f"{base_name}.py")
 
     visitor_class = f'{base_name}Visitor'
 
     with open(path, 'w', encoding='utf-8') as writer:
-        writer.write("from typing import List, Any\n")
-        writer.write("from tokens import Token\n")
+        writer.write("from .tokens import Token\n")
+        for line in imports:
+            writer.write(f"{line}\n")
         writer.write("from abc import ABC, abstractmethod\n")
         # generates the visitor abstract class of Expr
 
@@ -38,6 +57,9 @@ def define_ast(output_dir, base_name: str, types: Dict):
         # this will generate the expr class with accept
         writer.write("\n\n")
         writer.write(f"class {base_name}(ABC):\n")
+        # empty slots all the way up the hierarchy, so nodes don't get a per instance __dict__
+        writer.write(f"{INDENT}__slots__ = ()\n")
+        writer.write("\n")
         writer.write(f"{INDENT}@abstractmethod\n")
         writer.write(f"{INDENT}def accept(self, visitor: {visitor_class}):\n")
         writer.write(f"{INDENT * 2}pass\n")
@@ -61,7 +83,7 @@ def define_visitor(writer: TextIO, base_name: str, types: list[str]):
         writer.write("\n")
         writer.write(f"{INDENT}@abstractmethod")
         writer.write("\n")
-        writer.write(f"{INDENT}def visit_{typ.lower()}_{name}(self, expr: '{base_name}'):")
+        writer.write(f"{INDENT}def visit_{typ.lower()}_{name}(self, {name}: '{base_name}'):")
         writer.write("\n")
         writer.write(f"{INDENT * 2}pass")
         writer.write("\n")
@@ -71,6 +93,10 @@ def define_type(writer: TextIO, base_name: str, class_name: str, field_list: str
     visitor_class = f'{base_name}Visitor'
     writer.write(f"class {class_name}({base_name}):")
     writer.write(f"\n")
+    field_names = [field.split(':')[0] for field in field_list]
+    writer.write(f"{INDENT}__slots__ = {tuple(field_names)!r}")
+    writer.write("\n")
+    writer.write("\n")
     writer.write(f'{INDENT}def __init__(self, {", ".join(field_list)}):')
     writer.write("\n")
     for field in field_list:
@@ -85,13 +111,13 @@ def define_type(writer: TextIO, base_name: str, class_name: str, field_list: str
     writer.write("\n")
 def main():
     output_dir = args.output
-    base_name = "Expr"
 
     # Ensure the output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    # Call the define_ast function to generate the file
-    define_ast(output_dir, base_name, EXPRESSIONS)
+    # Call the define_ast function to generate the files
+    define_ast(output_dir, "Expr", EXPRESSIONS)
+    define_ast(output_dir, "Stmt", STATEMENTS, ("from .Expr import Expr",))
 
 
 if __name__ == '__main__':